@@ -0,0 +1,75 @@
+import argparse
+import glob
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fetcher
+from h1bdata import H1B_URLS, fetch_h1b_data, parse_h1b_page
+
+def sample_page(rows=100):
+    """A section page shaped like h1bdata.info's ranking tables."""
+    body = "".join(
+        f"<tr><td>{i}</td><td>Employer {i}</td><td>{(rows - i) * 37:,}</td><td>${90_000 + i * 311:,}</td></tr>"
+        for i in range(1, rows + 1)
+    )
+    return ("<html><body><table><tr><th>#</th><th>Company Name</th><th># of H-1B Filings</th>"
+            f"<th>Average Salary</th></tr>{body}</table></body></html>").encode()
+
+@contextmanager
+def serve_pages(pages, latency=0.0):
+    """Local stand-in for h1bdata.info: serves {path: bytes} after `latency` seconds per request.
+
+    A list of (status, bytes) is served one entry per request, e.g. to script a 503 before a 200.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = pages.get(self.path)
+            status = 200 if body is not None else 404
+            if isinstance(body, list):
+                status, body = body.pop(0) if len(body) > 1 else body[0]
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def local_urls(base):
+    return {section: base + "/" + url.rsplit("/", 1)[1] for section, url in H1B_URLS.items()}
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Sequential vs concurrent section fetch against a local stand-in")
+    ap.add_argument("--latency", type=float, default=0.3, help="seconds the stand-in waits per request")
+    ap.add_argument("--rows", type=int, default=100, help="rows per generated page")
+    ap.add_argument("--pages-dir", help="serve saved <section>.php pages from this directory instead")
+    args = ap.parse_args()
+
+    if args.pages_dir:
+        pages = {"/" + os.path.basename(p): open(p, "rb").read() for p in glob.glob(os.path.join(args.pages_dir, "*.php"))}
+    else:
+        pages = {"/" + url.rsplit("/", 1)[1]: sample_page(args.rows) for url in H1B_URLS.values()}
+
+    with serve_pages(pages, args.latency) as base:
+        urls = local_urls(base)
+        t = time.perf_counter()
+        for section, url in urls.items():
+            fetch_h1b_data(section, url)
+        sequential = time.perf_counter() - t
+        t = time.perf_counter()
+        fetcher.run_all(urls, parse_h1b_page)
+        concurrent = time.perf_counter() - t
+    print(f"\nsequential {sequential:.2f}s  concurrent {concurrent:.2f}s  speedup {sequential / concurrent:.1f}x")
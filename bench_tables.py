@@ -0,0 +1,88 @@
+import argparse
+import glob
+import os
+import time
+import pandas as pd
+from bs4 import BeautifulSoup
+import tables
+
+CHROME = "".join(f'<div class="nav"><a href="/p{i}">Link {i}</a><span>menu &amp; item {i}</span></div>' for i in range(400))
+SCRIPT = "<script>" + "var x = 1;" * 2000 + "</script>"
+
+def h1bdata_page(rows=1000):
+    """Page shaped like an h1bdata.info ranking: page chrome, then a th-headed table."""
+    body = "".join(
+        f"<tr><td>{i}</td><td><a href='/c{i}'>Employer {i}</a></td><td>{(rows - i) * 37:,}</td>"
+        f"<td>${90_000 + i * 311:,}</td><td><a href='/l{i}'>view</a></td></tr>"
+        for i in range(1, rows + 1)
+    )
+    return (f"<html><head>{SCRIPT}</head><body>{CHROME}<table class='tablesorter'><thead><tr><th>#</th>"
+            "<th>Company Name</th><th># of H-1B Filings</th><th>Average Salary</th><th>Latest Filings</th></tr>"
+            f"</thead><tbody>{body}</tbody></table>{CHROME}</body></html>")
+
+def myvisajobs_page(rows=100):
+    """Page shaped like a MyVisaJobs report page: td-only header row and extra trailing columns."""
+    body = "".join(
+        f"<tr><td>{i}</td><td><a href='/e{i}'><b>Employer {i}</b></a></td><td>{(rows - i + 1) * 53:,}</td>"
+        f"<td>${80_000 + i * 127:,}</td><td>{i % 7}</td></tr>"
+        for i in range(1, rows + 1)
+    )
+    return (f"<html><head>{SCRIPT}</head><body>{CHROME}<table><tr><td>Rank</td><td>Employer</td><td>LCA</td>"
+            f"<td>Salary</td><td>Other</td></tr>{body}</table>{CHROME}</body></html>")
+
+def soup_h1bdata(html):
+    """The previous full-tree BeautifulSoup extraction, kept as the baseline."""
+    table = BeautifulSoup(html, "html.parser").find("table")
+    headers = [th.text.strip().lower().replace(" ", "_") for th in table.find_all("th")]
+    data = [[td.text.strip() for td in tr.find_all("td")] for tr in table.find_all("tr")[1:]]
+    df = pd.DataFrame(data, columns=headers)
+    df["#_of_h-1b_filings"] = df["#_of_h-1b_filings"].str.replace(",", "").astype(int)
+    df["average_salary"] = df["average_salary"].str.replace(r"[\$,]", "", regex=True).astype(float)
+    return df
+
+def soup_myvisajobs(html):
+    table = BeautifulSoup(html, "html.parser").find("table")
+    data = []
+    for row in table.find_all("tr")[1:]:
+        cols = row.find_all("td")
+        if len(cols) < 4:
+            continue
+        rank_text = cols[0].text.strip()
+        employer = cols[1].text.strip()
+        lca_count_text = cols[2].text.strip().replace(",", "")
+        avg_salary_text = cols[3].text.strip().replace("$", "").replace(",", "")
+        rank = int(rank_text) if rank_text.isdigit() else None
+        lca_count = int(lca_count_text) if lca_count_text.isdigit() else None
+        avg_salary = float(avg_salary_text) if avg_salary_text.replace(".", "").isdigit() else None
+        if rank and employer and lca_count and avg_salary:
+            data.append([rank, employer, lca_count, avg_salary])
+    return pd.DataFrame(data, columns=tables.SPONSOR_COLUMNS)
+
+def fast_h1bdata(html):
+    df = tables.snake_headers(tables.table_frame(html))
+    df["#_of_h-1b_filings"] = tables.to_number(df["#_of_h-1b_filings"], int)
+    df["average_salary"] = tables.to_number(df["average_salary"])
+    return df
+
+def timed(fn, html, repeat):
+    t = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    return (time.perf_counter() - t) / repeat
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Full BeautifulSoup parse vs table-only extraction")
+    ap.add_argument("--pages-dir", help="saved pages: h1bdata_*.html and myvisajobs_*.html")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.pages_dir:
+        fixtures = [(os.path.basename(p), open(p, encoding="utf-8", errors="replace").read())
+                    for p in sorted(glob.glob(os.path.join(args.pages_dir, "*.html")))]
+    else:
+        fixtures = [("h1bdata_topcompanies.html", h1bdata_page()), ("myvisajobs_h1b.html", myvisajobs_page())]
+
+    for name, html in fixtures:
+        soup, fast = (soup_h1bdata, fast_h1bdata) if name.startswith("h1bdata") else (soup_myvisajobs, tables.sponsor_rows)
+        old, new = timed(soup, html, args.repeat), timed(fast, html, args.repeat)
+        print(f"{name:<32} {len(html) / 1e3:8.0f} kB  soup {old * 1e3:8.1f} ms  table-only {new * 1e3:7.1f} ms  speedup {old / new:5.1f}x")
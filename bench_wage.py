@@ -0,0 +1,47 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from etl.clean import ANNUAL_HOURS, normalize_wage
+
+UNITS = ["Year", "Hour", "Week", "Bi-Weekly", "Month"]
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "wage_offered": rng.uniform(20, 200000, n).round(2),
+        "wage_unit": rng.choice(UNITS, n),
+    })
+
+def rowwise(df):
+    """The previous df.apply(to_annual, axis=1) implementation, kept as the baseline."""
+    df = df.copy()
+    df['wage_unit'] = df['wage_unit'].str.upper().str.strip()
+    def to_annual(r):
+        u = r['wage_unit']; w = float(r['wage_offered'])
+        if u == 'YEAR': return w
+        if u == 'HOUR': return w * ANNUAL_HOURS
+        if u == 'WEEK': return w * 52.0
+        return w
+    df['wage_annual'] = df.apply(to_annual, axis=1)
+    return df
+
+def timed(fn, df):
+    t = time.perf_counter()
+    fn(df)
+    return time.perf_counter() - t
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark wage annualization")
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    ap.add_argument("--skip-rowwise", action="store_true", help="row-wise apply takes minutes at 10M rows")
+    args = ap.parse_args()
+
+    for n in args.rows:
+        df = make_frame(n)
+        vec = timed(normalize_wage, df)
+        line = f"{n:>12,} rows  vectorized {vec:8.3f}s"
+        if not args.skip_rowwise:
+            old = timed(rowwise, df)
+            line += f"  row-wise {old:8.3f}s  speedup {old / vec:6.1f}x"
+        print(line)
@@ -0,0 +1,76 @@
+
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ['decision_year', 'state', 'employer', 'case_status']
+
+def bitmap_rows(bitmap: np.ndarray, n: int = None) -> np.ndarray:
+    """Row positions set in a packed bitmap, ascending."""
+    nz = np.flatnonzero(bitmap)
+    if len(nz) * 4 > len(bitmap):
+        return np.flatnonzero(np.unpackbits(bitmap, count=n))
+    # sparse selection: unpack only the non-zero bytes
+    r, c = np.nonzero(np.unpackbits(bitmap[nz]).reshape(-1, 8))
+    return nz[r] * 8 + c
+
+class ColumnBitmaps:
+    """Row bitmaps per distinct value of one column.
+
+    Frequent values (more than 1/32 of rows) keep a dense packed bitmap;
+    rarer ones keep a sorted row-id list, which is smaller than a bitmap
+    below that density (same container split as roaring bitmaps).
+    """
+
+    def __init__(self, values: pd.Series):
+        codes, uniques = pd.factorize(values)
+        self.n = len(codes)
+        self.nbytes = (self.n + 7) // 8
+        self.code_of = {v: i for i, v in enumerate(uniques)}
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        dense = counts * 32 > self.n
+        self.dense = {int(c): np.packbits(codes == c) for c in np.flatnonzero(dense)}
+        # CSR postings for the sparse values
+        sparse_rows = np.flatnonzero((codes >= 0) & ~dense[np.maximum(codes, 0)])
+        sparse_rows = sparse_rows[np.argsort(codes[sparse_rows], kind='stable')]
+        self.rows = sparse_rows.astype(np.int32)
+        self.offsets = np.concatenate([[0], np.cumsum(np.where(dense, 0, counts))])
+
+    def union(self, values) -> np.ndarray:
+        """Packed bitmap of rows whose value is in `values`."""
+        acc = np.zeros(self.nbytes, dtype=np.uint8)
+        parts = []
+        for v in values:
+            c = self.code_of.get(v)
+            if c is None:
+                continue
+            if c in self.dense:
+                acc |= self.dense[c]
+            else:
+                parts.append(self.rows[self.offsets[c]:self.offsets[c + 1]])
+        if parts:
+            rows = np.concatenate(parts)
+            np.bitwise_or.at(acc, rows >> 3, (0x80 >> (rows & 7)).astype(np.uint8))
+        return acc
+
+class BitmapIndex:
+    """Resolves sidebar filters by OR within a column and AND across columns."""
+
+    def __init__(self, df: pd.DataFrame, columns=FILTER_COLUMNS):
+        self.n = len(df)
+        self.columns = {c: ColumnBitmaps(df[c]) for c in columns}
+
+    def bitmap(self, **filters) -> np.ndarray:
+        """Packed bitmap for the filters; None skips a column, an empty list matches nothing."""
+        acc = None
+        for col, values in filters.items():
+            if values is None:
+                continue
+            b = self.columns[col].union(values)
+            acc = b if acc is None else acc & b
+        if acc is None:
+            acc = np.packbits(np.ones(self.n, dtype=bool))
+        return acc
+
+    def select(self, **filters) -> np.ndarray:
+        """Row positions matching the filters, in frame order."""
+        return bitmap_rows(self.bitmap(**filters), self.n)
@@ -1,13 +1,16 @@
-import pandas as pd
+import sys
+from bloomberg import bloomberg_schema, load_bloomberg
 
-# Load the Bloomberg 2024 dataset
-file_path = r"C:\Users\Syed\Downloads\h1b_data\TRK_13139_FY2024_single_reg.csv"
-df_bloomberg = pd.read_csv(file_path, dtype=str, low_memory=False)
+# Load the Bloomberg 2024 dataset (projected, categorical, cached as Parquet after the first run)
+file_path = sys.argv[1] if len(sys.argv) > 1 else r"C:\Users\Syed\Downloads\h1b_data\TRK_13139_FY2024_single_reg.csv"
 
-# Print column names
+# Print column names (read from the cached schema, no CSV scan)
 print("🧐 Column Names:")
-print(df_bloomberg.columns.tolist())
+print(bloomberg_schema(file_path))
+
+df_bloomberg = load_bloomberg(file_path)
 
 # Print first few rows
 print("\n📊 First 5 Rows:")
 print(df_bloomberg.head())
+print(f"\n💾 Memory: {df_bloomberg.memory_usage(deep=True).sum() / 1e6:.1f} MB")
@@ -0,0 +1,75 @@
+"""Projected, typed reader for the Bloomberg FY2024 H-1B registration file.
+
+Only the columns the loaders use are parsed, repeated text is held as
+categoricals and the converted frame is cached as Parquet next to a small
+JSON file holding the full source schema, so reruns (and schema inspection)
+never touch the multi-gigabyte CSV again.
+"""
+import os
+import pandas as pd
+from pandas.api.types import union_categoricals
+import source_cache
+
+CHUNK_ROWS = 250_000
+CACHE_VERSION = 1
+
+# Source column -> dtype for the projection the loaders need
+BLOOMBERG_DTYPES = {
+    "lottery_year": "category",
+    "status_type": "category",
+    "employer_name": "category",
+    "state": "category",
+    "city": "category",
+    "zip": "category",
+}
+REQUIRED_COLUMNS = ["lottery_year", "status_type"]
+
+
+def _cache_paths(path, cache_dir):
+    directory = os.path.join(cache_dir or os.path.dirname(os.path.abspath(path)), ".cache")
+    return source_cache.cache_paths(path, directory)
+
+
+def _read_meta(path, cache_dir):
+    """Cached metadata for path, or None when the source changed since it was written."""
+    return source_cache.read_meta(path, _cache_paths(path, cache_dir)[1], version=CACHE_VERSION)
+
+
+def _concat_categorical(chunks):
+    """Concatenates chunk frames without letting categorical columns decay to object."""
+    if len(chunks) == 1:
+        return chunks[0]
+    out = {}
+    for col in chunks[0].columns:
+        out[col] = union_categoricals([c[col] for c in chunks], ignore_order=True)
+    return pd.DataFrame(out)
+
+
+def read_source(path, chunksize=CHUNK_ROWS):
+    """Parses the projected columns of the CSV chunk by chunk. Returns (frame, full column list)."""
+    columns = pd.read_csv(path, nrows=0).columns.tolist()
+    dtypes = {c: t for c, t in BLOOMBERG_DTYPES.items() if c in columns}
+    chunks = list(pd.read_csv(path, usecols=list(dtypes), dtype=dtypes, chunksize=chunksize))
+    if not chunks:
+        return pd.DataFrame({c: pd.Categorical([]) for c in dtypes}), columns
+    df = _concat_categorical(chunks)
+    return df[list(dtypes)], columns
+
+
+def load_bloomberg(path, chunksize=CHUNK_ROWS, cache_dir=None):
+    """Returns the projected, categorical Bloomberg frame, from the Parquet cache when it is current."""
+    data_path, meta_path = _cache_paths(path, cache_dir)
+    if _read_meta(path, cache_dir) is not None and os.path.exists(data_path):
+        return pd.read_parquet(data_path)
+
+    df, columns = read_source(path, chunksize)
+    source_cache.write_cache(df, path, data_path, meta_path, version=CACHE_VERSION, rows=len(df), columns=columns)
+    return df
+
+
+def bloomberg_schema(path, cache_dir=None):
+    """Full column list of the source file, served from the cached schema when available."""
+    meta = _read_meta(path, cache_dir)
+    if meta is not None:
+        return meta["columns"]
+    return pd.read_csv(path, nrows=0).columns.tolist()
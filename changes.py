@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+import db
+
+# One fingerprint per (section, key) from the last write
+FINGERPRINT_TABLE = "h1b_row_fingerprints"
+VALUE_COLUMNS = ["filings", "avg_salary"]
+
+_table_ready = set()
+
+
+def ensure_fingerprint_table(cursor):
+    """Creates the fingerprint store once per process and database.
+
+    Callers run this before starting concurrent saves: concurrent
+    CREATE TABLE IF NOT EXISTS statements can collide in the catalog.
+    """
+    dsn = cursor.connection.dsn
+    if dsn in _table_ready:
+        return
+    cursor.execute("SELECT to_regclass(%s)", (FINGERPRINT_TABLE,))
+    if cursor.fetchone()[0] is not None:
+        _table_ready.add(dsn)
+        return
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {FINGERPRINT_TABLE} (
+        section TEXT,
+        row_key TEXT,
+        fingerprint BIGINT,
+        PRIMARY KEY (section, row_key)
+    )
+    """)
+    _table_ready.add(dsn)
+
+
+def row_fingerprints(df, value_columns=VALUE_COLUMNS):
+    """Stable 64-bit hash of each row's value columns (same values -> same hash across runs)."""
+    return pd.util.hash_pandas_object(df[value_columns], index=False).to_numpy().view(np.int64)
+
+
+def clear_fingerprints(cursor, section):
+    """Forgets every fingerprint of `section`, so its next upsert_changed writes all rows.
+
+    Any writer that changes a section's table outside upsert_changed (e.g.
+    rollups.refresh_rankings) calls this in the same transaction.
+    """
+    cursor.execute("SELECT to_regclass(%s)", (FINGERPRINT_TABLE,))
+    if cursor.fetchone()[0] is not None:
+        cursor.execute(f"DELETE FROM {FINGERPRINT_TABLE} WHERE section = %s", (section,))
+
+
+def upsert_changed(cursor, section, df, columns, conflict, value_columns=VALUE_COLUMNS):
+    """Upserts only rows whose values differ from the previous run; returns (inserted, updated, skipped).
+
+    Fingerprints are written in the same transaction as the rows, so the
+    store never claims a row was written when the write rolled back. Other
+    writers of the section's table clear its fingerprints (see
+    clear_fingerprints). The fingerprint table must exist (see
+    ensure_fingerprint_table).
+    """
+    keys = df[conflict].astype(str).to_numpy()
+    fps = row_fingerprints(df, value_columns)
+
+    cursor.execute(f"SELECT row_key, fingerprint FROM {FINGERPRINT_TABLE} WHERE section = %s", (section,))
+    previous = dict(cursor.fetchall())
+    changed = np.fromiter((previous.get(k) != f for k, f in zip(keys, fps.tolist())), dtype=bool, count=len(keys))
+
+    inserted, updated = db.upsert_values(
+        cursor, section, columns, conflict, df.loc[changed, columns].itertuples(index=False, name=None)
+    )
+    db.upsert_values(
+        cursor, FINGERPRINT_TABLE, ["section", "row_key", "fingerprint"], ["section", "row_key"],
+        [(section, k, f) for k, f in zip(keys[changed], fps[changed].tolist())],
+    )
+    return inserted, updated, int((~changed).sum())
@@ -1,31 +1,182 @@
 
+import os
+from functools import lru_cache, reduce
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+import source_cache
 ANNUAL_HOURS = 2080.0
+CHUNK_ROWS = 250_000
+
+# Annualization multiplier per canonical OFLC wage unit
+WAGE_UNIT_MULTIPLIER = {
+    'YEAR': 1.0,
+    'MONTH': 12.0,
+    'BI-WEEKLY': 26.0,
+    'WEEK': 52.0,
+    'HOUR': ANNUAL_HOURS,
+}
+# Spellings seen across disclosure years -> canonical unit
+WAGE_UNIT_ALIASES = {
+    'YR': 'YEAR', 'ANNUAL': 'YEAR', 'YEARLY': 'YEAR',
+    'MTH': 'MONTH', 'MONTHLY': 'MONTH',
+    'BIWEEKLY': 'BI-WEEKLY', 'BI-WEEK': 'BI-WEEKLY', 'BI WEEKLY': 'BI-WEEKLY',
+    'WK': 'WEEK', 'WEEKLY': 'WEEK',
+    'HR': 'HOUR', 'HOURLY': 'HOUR',
+}
+
+# Compact dtypes for cleaned records; category doubles as dictionary encoding for soc_code
+COMPACT_SCHEMA = {
+    'employer': 'category',
+    'job_title': 'category',
+    'city': 'category',
+    'state': 'category',
+    'case_status': 'category',
+    'wage_unit': 'category',
+    'soc_code': 'category',
+    'wage_annual': 'float32',
+    'decision_year': 'int16',
+}
+
+def wage_amount(s: pd.Series) -> pd.Series:
+    """Numeric wage; '$85,000 - $95,000' style ranges use the lower bound like OFLC's WAGE_RATE_OF_PAY_FROM."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype(float)
+    s = s.astype(str).str.replace(r'[\$,\s]', '', regex=True)
+    return pd.to_numeric(s.str.split('-', n=1).str[0], errors='coerce')
+
+def wage_multiplier(units: pd.Series):
+    """Canonical units and annualization factors, computed once per distinct unit and broadcast by code."""
+    codes, uniques = pd.factorize(units)
+    canon = pd.Index(uniques).astype(str).str.upper().str.strip()
+    canon = np.array([WAGE_UNIT_ALIASES.get(u, u) for u in canon], dtype=object)
+    mult = np.array([WAGE_UNIT_MULTIPLIER.get(u, 1.0) for u in canon], dtype=float)
+    # code -1 (missing unit) picks the trailing NaN / 1.0
+    return np.append(canon, np.nan)[codes], np.append(mult, 1.0)[codes]
 
 def normalize_wage(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df['wage_unit'] = df['wage_unit'].str.upper().str.strip()
-    def to_annual(r):
-        u = r['wage_unit']; w = float(r['wage_offered'])
-        if u == 'YEAR': return w
-        if u == 'HOUR': return w * ANNUAL_HOURS
-        if u == 'WEEK': return w * 52.0
-        return w
-    df['wage_annual'] = df.apply(to_annual, axis=1)
+    return _normalize_wage(df.copy())
+
+def _normalize_wage(df: pd.DataFrame) -> pd.DataFrame:
+    unit, mult = wage_multiplier(df['wage_unit'])
+    df['wage_unit'] = unit
+    # Unknown units pass through unscaled, as before
+    df['wage_annual'] = wage_amount(df['wage_offered']).to_numpy() * mult
     return df
 
-def basic_clean(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    for c in ['employer','job_title','city','state','case_status']:
-        df[c] = df[c].astype(str).str.strip()
-    df['employer'] = df['employer'].str.title()
-    df['job_title'] = df['job_title'].str.title()
-    df['city'] = df['city'].str.title()
-    df['state'] = df['state'].str.upper()
+# Per-column string normalization applied by basic_clean (after strip)
+TEXT_RULES = {
+    'employer': str.title,
+    'job_title': str.title,
+    'city': str.title,
+    'state': str.upper,
+    'case_status': None,
+}
+# raw value -> normalized value per column, shared across chunks and files in this process
+NORM_CACHE = {c: {} for c in TEXT_RULES}
+
+def normalize_unique(s: pd.Series, rule=None, lookup: dict = None) -> np.ndarray:
+    """Strip (+ rule) each distinct value once and broadcast back by factorize code."""
+    lookup = {} if lookup is None else lookup
+    def norm(k):
+        v = lookup.get(k)
+        if v is None:
+            v = k.strip()
+            if rule is not None:
+                v = rule(v)
+            lookup[k] = v
+        return v
+    codes, uniques = pd.factorize(s)
+    out = np.array([norm(k) for k in pd.Index(uniques).astype(str)] + [None], dtype=object)[codes]
+    missing = codes < 0
+    if missing.any():
+        # None/NaN keep their astype(str) spelling ('None', 'nan') as before
+        out[missing] = [norm(k) for k in s[missing].astype(str)]
+    return out
+
+def basic_clean(df: pd.DataFrame, norm_cache: dict = None) -> pd.DataFrame:
+    return _basic_clean(df.copy(), norm_cache)
+
+def _basic_clean(df: pd.DataFrame, norm_cache: dict = None) -> pd.DataFrame:
+    norm_cache = NORM_CACHE if norm_cache is None else norm_cache
+    for c, rule in TEXT_RULES.items():
+        df[c] = normalize_unique(df[c], rule, norm_cache.setdefault(c, {}))
     return df
 
-def load_cleaned(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
-    df = basic_clean(df)
-    df = normalize_wage(df)
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply COMPACT_SCHEMA to the columns present; years with gaps fall back to nullable Int16."""
+    plan = {}
+    for c, dtype in COMPACT_SCHEMA.items():
+        if c not in df.columns:
+            continue
+        if dtype == 'int16' and df[c].isna().any():
+            dtype = 'Int16'
+        plan[c] = dtype
+    return df.astype(plan)
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Bytes per column (deep) before and after compaction, with a TOTAL row."""
+    rep = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'bytes_before': before.memory_usage(index=False, deep=True),
+        'dtype_after': after.dtypes.astype(str),
+        'bytes_after': after.memory_usage(index=False, deep=True),
+    })
+    rep.loc['TOTAL'] = ['', rep['bytes_before'].sum(), '', rep['bytes_after'].sum()]
+    rep['ratio'] = rep['bytes_before'] / rep['bytes_after']
+    return rep
+
+def _concat_compact(chunks: list) -> pd.DataFrame:
+    """Concatenate compacted chunks column by column; categoricals merge their codes via union_categoricals."""
+    out = {}
+    for c in chunks[0].columns:
+        parts = [chunk.pop(c) for chunk in chunks]  # release each chunk's column as it is merged
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            try:
+                out[c] = union_categoricals(parts, sort_categories=True, ignore_order=True)
+            except TypeError:  # category dtypes differ, e.g. an all-NaN chunk
+                out[c] = pd.concat([p.astype(object) for p in parts], ignore_index=True).astype('category')
+        else:
+            out[c] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(out)
+
+def iter_cleaned(path: str, chunksize: int = CHUNK_ROWS, **read_kw):
+    """Yield cleaned frames of at most `chunksize` rows; each chunk is cleaned in place, no extra copies."""
+    for chunk in pd.read_csv(path, chunksize=chunksize, **read_kw):
+        yield _normalize_wage(_basic_clean(chunk))
+
+def reduce_cleaned(path: str, fn, initial, chunksize: int = CHUNK_ROWS, **read_kw):
+    """Fold fn(acc, chunk) over the cleaned chunks, e.g. to build aggregates without the full frame."""
+    return reduce(fn, iter_cleaned(path, chunksize, **read_kw), initial)
+
+@lru_cache(maxsize=None)
+def clean_code_version() -> str:
+    """Hash of this module's and source_cache's source; an edit to either invalidates cached output."""
+    return source_cache.file_sha256(__file__)[:8] + source_cache.file_sha256(source_cache.__file__)[:8]
+
+def _read_cache(path: str, cache_dir: str):
+    data_path, meta_path = source_cache.cache_paths(path, cache_dir, '.cleaned')
+    if not os.path.exists(data_path) or source_cache.read_meta(path, meta_path, code_version=clean_code_version()) is None:
+        return None
+    return pd.read_parquet(data_path, memory_map=True)
+
+def _write_cache(df: pd.DataFrame, path: str, cache_dir: str) -> None:
+    source_cache.write_cache(df, path, *source_cache.cache_paths(path, cache_dir, '.cleaned'), code_version=clean_code_version())
+
+def load_cleaned(path: str, chunksize: int = CHUNK_ROWS, cache_dir: str = None) -> pd.DataFrame:
+    """Cleaned frame for `path`; with `cache_dir`, reuse a Parquet copy keyed by source hash/mtime and code version."""
+    if cache_dir:
+        df = _read_cache(path, cache_dir)
+        if df is not None:
+            return df
+    # Compact each chunk as it is read, so the full frame only ever exists in its compact form
+    chunks = [compact_dtypes(chunk) for chunk in iter_cleaned(path, chunksize)]
+    df = _concat_compact(chunks) if chunks else compact_dtypes(pd.read_csv(path, nrows=0))
+    if cache_dir:
+        _write_cache(df, path, cache_dir)
     return df
+
+if __name__ == '__main__':
+    import sys
+    raw = pd.concat(iter_cleaned(sys.argv[1]), ignore_index=True)
+    print(memory_report(raw, compact_dtypes(raw)).to_string())
@@ -0,0 +1,22 @@
+import os
+import pytest
+import db
+
+@pytest.fixture
+def dbname():
+    """Name of the local PostgreSQL test database (H1B_TEST_DB); skips the test when it is unreachable."""
+    psycopg2 = pytest.importorskip("psycopg2")
+    name = os.environ.get("H1B_TEST_DB", "visa_tracker_test")
+    try:
+        psycopg2.connect(**{**db.DB_PARAMS, "dbname": name}).close()
+    except psycopg2.OperationalError:
+        pytest.skip("no local PostgreSQL test database")
+    return name
+
+@pytest.fixture
+def pg(dbname):
+    """Autocommit connection to the test database, outside the db pool."""
+    c = db.psycopg2.connect(**{**db.DB_PARAMS, "dbname": dbname})
+    c.autocommit = True
+    yield c
+    c.close()
@@ -1,6 +1,6 @@
 import requests
 from bs4 import BeautifulSoup
-import psycopg2
+import db
 import queue
 import time
 from urllib.parse import urljoin
@@ -10,14 +10,8 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 
-# PostgreSQL Connection
-DB_PARAMS = {
-    "dbname": "visa_tracker",
-    "user": "postgres",
-    "password": "postgres",
-    "host": "localhost",
-    "port": "5432",
-}
+# PostgreSQL database (connection settings live in db.py)
+DB_NAME = "visa_tracker"
 
 # Visa-related forums and discussion pages
 SEED_LINKS = [
@@ -68,32 +62,26 @@ print("🔍 Sample Data:", discussions[:5])  # Print first 5 extracted records
 def save_to_postgres(discussions, source):
     """Stores extracted discussions into PostgreSQL."""
     try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        cursor = conn.cursor()
-
         # 🔹 Ensure table names are valid
         source = source.replace("-", "_").replace(".", "_")
 
-        cursor.execute(f"""
-        CREATE TABLE IF NOT EXISTS {source}_discussions (
-            id SERIAL PRIMARY KEY,
-            title TEXT,
-            link TEXT UNIQUE,
-            timestamp TEXT,
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-
-        for title, link, timestamp in discussions:
+        with db.connection(dbname=DB_NAME) as conn, conn.cursor() as cursor:
             cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {source}_discussions (
+                id SERIAL PRIMARY KEY,
+                title TEXT,
+                link TEXT UNIQUE,
+                timestamp TEXT,
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+
+            cursor.executemany(f"""
             INSERT INTO {source}_discussions (title, link, timestamp)
             VALUES (%s, %s, %s)
             ON CONFLICT (link) DO NOTHING
-            """, (title, link, timestamp))
+            """, discussions)
 
-        conn.commit()
-        cursor.close()
-        conn.close()
         print(f"✅ {source.capitalize()} Discussions saved to PostgreSQL!")
 
     except Exception as e:
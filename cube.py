@@ -0,0 +1,69 @@
+
+import numpy as np
+import pandas as pd
+from etl.sketch import N_BINS, WageSketch, wage_bin
+
+CUBE_KEYS = ['decision_year', 'state', 'employer', 'case_status']
+CERTIFIED = 'CERTIFIED'
+
+class RollupCube:
+    """Counts, certified counts and wage sketches per (year, state, employer, status) cell.
+
+    Dashboard queries select cells with a boolean mask and aggregate those,
+    so their cost follows the number of cells rather than the number of rows.
+    """
+
+    def __init__(self, cells: pd.DataFrame, hist_cell: np.ndarray, hist_bin: np.ndarray, hist_n: np.ndarray):
+        self.cells = cells
+        self.hist_cell = hist_cell
+        self.hist_bin = hist_bin
+        self.hist_n = hist_n
+
+    def mask(self, years=None, states=None, employers=None, statuses=None) -> np.ndarray:
+        """Cells matching the filters; None skips a filter, an empty list matches nothing."""
+        m = np.ones(len(self.cells), dtype=bool)
+        for col, sel in zip(CUBE_KEYS, (years, states, employers, statuses)):
+            if sel is not None:
+                m &= self.cells[col].isin(list(sel)).to_numpy()
+        return m
+
+    def total(self, m: np.ndarray) -> int:
+        return int(self.cells['count'].to_numpy()[m].sum())
+
+    def approval_rate(self, m: np.ndarray) -> float:
+        total = self.total(m)
+        return self.cells['certified'].to_numpy()[m].sum() / total if total else float('nan')
+
+    def wage_sketch(self, m: np.ndarray) -> WageSketch:
+        """Merge of the selected cells' sketches."""
+        sel = m[self.hist_cell]
+        return WageSketch(np.bincount(self.hist_bin[sel], weights=self.hist_n[sel], minlength=N_BINS))
+
+    def median_wage(self, m: np.ndarray) -> float:
+        return self.wage_sketch(m).quantile(0.5)
+
+    def wage_percentiles(self, m: np.ndarray, qs=(0.25, 0.5, 0.75)) -> list:
+        return self.wage_sketch(m).quantiles(qs)
+
+    def yearly(self, m: np.ndarray) -> pd.DataFrame:
+        c = self.cells[m]
+        return c.groupby('decision_year', observed=True)['count'].sum().reset_index()
+
+    def top_employers(self, m: np.ndarray, n: int = 15) -> pd.DataFrame:
+        c = self.cells[m]
+        top = c.groupby('employer', observed=True)['count'].sum().nlargest(n)
+        return top.reset_index()
+
+def build_cube(df: pd.DataFrame) -> RollupCube:
+    g = df.groupby(CUBE_KEYS, observed=True, dropna=False, sort=False)
+    cell = g.ngroup().to_numpy()
+    n_cells = g.ngroups
+    cells = g.size().rename('count').reset_index()
+    certified = (df['case_status'] == CERTIFIED).to_numpy()
+    cells['certified'] = np.bincount(cell, weights=certified, minlength=n_cells).astype(np.int64)
+
+    # sparse per-cell sketches: one entry per non-empty (cell, bin)
+    b = wage_bin(df['wage_annual'].to_numpy(dtype=float))
+    ok = b >= 0
+    key, n = np.unique(cell[ok].astype(np.int64) * N_BINS + b[ok], return_counts=True)
+    return RollupCube(cells, (key // N_BINS).astype(np.int64), (key % N_BINS).astype(np.int64), n)
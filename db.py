@@ -0,0 +1,144 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+
+# PostgreSQL Connection Parameters (override with H1B_DB_* environment variables)
+DB_PARAMS = {
+    "dbname": os.environ.get("H1B_DB_NAME", "visa_tracker2"),
+    "user": os.environ.get("H1B_DB_USER", "postgres"),
+    "password": os.environ.get("H1B_DB_PASSWORD", "postgres"),
+    "host": os.environ.get("H1B_DB_HOST", "localhost"),
+    "port": os.environ.get("H1B_DB_PORT", "5432"),
+}
+
+POOL_MIN = int(os.environ.get("H1B_DB_POOL_MIN", "1"))
+POOL_MAX = int(os.environ.get("H1B_DB_POOL_MAX", "8"))
+UPSERT_PAGE_SIZE = int(os.environ.get("H1B_DB_PAGE_SIZE", "500"))  # rows per multi-row VALUES statement
+HEALTHCHECK_IDLE = 30.0  # seconds idle before a pooled connection is pinged on checkout
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PooledConnection(extensions.connection):
+    """psycopg2 connection that remembers its prepared statements and last use."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.last_used = time.monotonic()
+
+
+def get_pool(**params):
+    """Process-wide pool for DB_PARAMS (+ overrides), created on first use."""
+    params = {**DB_PARAMS, **params}
+    key = (os.getpid(), tuple(sorted(params.items())))  # a forked worker never reuses its parent's sockets
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ThreadedConnectionPool(POOL_MIN, POOL_MAX, connection_factory=PooledConnection, **params)
+            _pools[key] = pool
+        return pool
+
+
+def ping(conn):
+    """Health check: True if the connection can still run a query."""
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+@contextmanager
+def connection(**params):
+    """Pooled connection; commits on success, rolls back on error, always returns to the pool."""
+    pool = get_pool(**params)
+    conn = pool.getconn()
+    if conn.closed or (time.monotonic() - conn.last_used > HEALTHCHECK_IDLE and not ping(conn)):
+        pool.putconn(conn, close=True)
+        conn = pool.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        conn.last_used = time.monotonic()
+        pool.putconn(conn, close=bool(conn.closed))
+
+
+def prepare_upsert(cursor, table, columns, conflict, update=None, extra_set=""):
+    """PREPAREs `INSERT ... ON CONFLICT DO UPDATE` once per connection and returns its statement name.
+
+    `update` lists the columns overwritten from EXCLUDED (default: every
+    non-conflict column); `extra_set` appends raw SET assignments.
+    """
+    update = [c for c in columns if c != conflict] if update is None else update
+    assignments = [f"{c} = EXCLUDED.{c}" for c in update] + ([extra_set] if extra_set else [])
+    placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+    statement = f"""
+    INSERT INTO {table} ({", ".join(columns)})
+    VALUES ({placeholders})
+    ON CONFLICT ({conflict}) DO UPDATE
+    SET {", ".join(assignments)}
+    """
+    # one name per statement shape, so different writers for a table never collide
+    name = f"upsert_{table}_{hashlib.md5(statement.encode()).hexdigest()[:8]}"
+    conn = cursor.connection
+    if name not in conn.prepared:
+        cursor.execute(f"PREPARE {name} AS {statement}")
+        conn.prepared.add(name)
+    return name
+
+
+def execute_prepared(cursor, name, rows):
+    """Runs a prepared statement for every row tuple."""
+    rows = list(rows)
+    if rows:
+        placeholders = ", ".join(["%s"] * len(rows[0]))
+        cursor.executemany(f"EXECUTE {name} ({placeholders})", rows)
+
+
+def upsert_values(cursor, table, columns, conflict, rows, update=None, page_size=UPSERT_PAGE_SIZE):
+    """Multi-row `INSERT ... VALUES (...), (...) ON CONFLICT DO UPDATE`, `page_size` rows per statement.
+
+    `conflict` is a column name or a list of them. Returns (inserted, updated).
+    Rows repeating a conflict key keep the last occurrence, since one
+    statement may not update the same row twice.
+    """
+    conflict = [conflict] if isinstance(conflict, str) else list(conflict)
+    key = [columns.index(c) for c in conflict]
+    rows = list({tuple(row[i] for i in key): row for row in rows}.values())
+    if not rows:
+        return 0, 0
+    update = [c for c in columns if c not in conflict] if update is None else update
+    results = execute_values(cursor, f"""
+    INSERT INTO {table} ({", ".join(columns)})
+    VALUES %s
+    ON CONFLICT ({", ".join(conflict)}) DO UPDATE
+    SET {", ".join(f"{c} = EXCLUDED.{c}" for c in update)}
+    RETURNING (xmax = 0)
+    """, rows, page_size=page_size, fetch=True)
+    inserted = sum(1 for (fresh,) in results if fresh)
+    return inserted, len(results) - inserted
+
+
+def close_all():
+    """Closes every pool owned by this process."""
+    with _pools_lock:
+        for key in [k for k in _pools if k[0] == os.getpid()]:
+            _pools.pop(key).closeall()
@@ -0,0 +1,88 @@
+"""Concurrent page fetcher for the scrapers.
+
+All URLs are requested at once on one asyncio event loop, with at most
+`per_host` requests in flight per host, a per-request timeout and
+retries with jittered exponential backoff. Each page is parsed in a worker thread
+as soon as it arrives, and the parsed result is handed to `on_result` in
+completion order, so a refresh cycle costs about as much as its slowest
+page instead of the sum of all of them.
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+import http_client
+
+PER_HOST = 6
+TIMEOUT = 15.0  # seconds per attempt
+RETRIES = 3
+BACKOFF = http_client.BACKOFF  # seconds, doubled after every failed attempt (with jitter)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+UNCHANGED = object()  # result for a page the HTTP cache reports as already processed
+
+
+async def _get(client, limit, url, timeout, retries, backoff, headers=None):
+    """GET url under its host's semaphore, retrying timeouts, connection errors and retryable statuses."""
+    for attempt in range(retries + 1):
+        try:
+            async with limit:
+                response = await client.get(url, headers=headers, timeout=timeout)
+            if response.status_code not in RETRY_STATUS or attempt == retries:
+                return response
+        except (httpx.TimeoutException, httpx.TransportError):
+            if attempt == retries:
+                raise
+        await asyncio.sleep(http_client.backoff_delay(attempt, backoff))
+
+
+async def fetch_all(urls, parse, on_result=None, per_host=PER_HOST, timeout=TIMEOUT,
+                    retries=RETRIES, backoff=BACKOFF, headers=HEADERS, cache=None):
+    """Fetches {name: url} concurrently; parse(name, response) runs in a thread per page.
+
+    on_result(name, result) is awaited (in a thread) as each page finishes,
+    before the remaining pages are done. Returns {name: result}; a page that
+    failed after all retries maps to None. With an http_cache.HttpCache the
+    requests are conditional and pages it reports unchanged map to UNCHANGED
+    without being parsed.
+    """
+    limits = {host: asyncio.Semaphore(per_host) for host in {urlsplit(url).netloc for url in urls.values()}}
+    loop = asyncio.get_running_loop()
+
+    async def one(name, url):
+        conditional = cache.conditional_headers(url) if cache is not None else None
+        try:
+            response = await _get(client, limits[urlsplit(url).netloc], url, timeout, retries, backoff, conditional)
+        except httpx.HTTPError as e:
+            print(f"❌ Failed to fetch {name}! {type(e).__name__}: {e}")
+            return name, None
+        if cache is not None:
+            response = cache.store(url, response.status_code, response.headers, response.content, response.encoding)
+            if not response.changed:
+                print(f"⏭️ {name} unchanged since the last run")
+                return name, UNCHANGED
+        return name, await loop.run_in_executor(None, parse, name, response)
+
+    results = {}
+    async with httpx.AsyncClient(headers=headers, follow_redirects=True,
+                                 limits=httpx.Limits(max_connections=None, max_keepalive_connections=per_host)) as client:
+        for done in asyncio.as_completed([one(name, url) for name, url in urls.items()]):
+            name, result = await done
+            results[name] = result
+            if on_result is not None and result is not None and result is not UNCHANGED:
+                await loop.run_in_executor(None, on_result, name, result)
+    return results
+
+
+def run_all(urls, parse, on_result=None, **kwargs):
+    """Blocking wrapper around fetch_all for the scripts; prints the cycle time."""
+    start = time.perf_counter()
+    results = asyncio.run(fetch_all(urls, parse, on_result, **kwargs))
+    fetched = sum(r is not None and r is not UNCHANGED for r in results.values())
+    unchanged = sum(r is UNCHANGED for r in results.values())
+    print(f"⏱️ Fetched {fetched}/{len(urls)} pages ({unchanged} unchanged) in {time.perf_counter() - start:.2f}s")
+    return results
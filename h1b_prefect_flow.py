@@ -1,19 +1,15 @@
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import psycopg2
+import tables
+import db
+import changes
+import http_cache
 from datetime import datetime, timezone
+import os
 import time
 from prefect import flow, task
-
-# PostgreSQL Connection Parameters
-DB_PARAMS = {
-    "dbname": "visa_tracker2",
-    "user": "postgres",
-    "password": "postgres",
-    "host": "localhost",
-    "port": "5432",
-}
+from prefect.client.orchestration import get_client
+from prefect.task_runners import ConcurrentTaskRunner, SequentialTaskRunner
+from prefect.utilities.asyncutils import run_sync
 
 # Define URLs for each section
 H1B_URLS = {
@@ -28,36 +24,81 @@ H1B_URLS = {
 # Headers to mimic a browser request
 HEADERS = {"User-Agent": "Mozilla/5.0"}
 
-@task
+# Conditional-GET cache on disk, shared by every task (and worker process) on this machine
+HTTP_CACHE = http_cache.HttpCache(consumer="h1b_prefect_flow")
+
+# Task tags and the server-side concurrency limit for each; the limit holds
+# across every flow run sharing the Prefect API, whatever the task runner
+FETCH_TAG = "h1bdata-http"
+SAVE_TAG = "h1b-postgres"
+CONCURRENCY_LIMITS = {
+    FETCH_TAG: int(os.environ.get("H1B_FETCH_CONCURRENCY", "4")),
+    SAVE_TAG: int(os.environ.get("H1B_SAVE_CONCURRENCY", "4")),
+}
+
+# "threads" (default), "processes" (needs prefect-dask) or "sequential"
+TASK_RUNNER = os.environ.get("H1B_TASK_RUNNER", "threads")
+MAX_WORKERS = int(os.environ.get("H1B_MAX_WORKERS", "4"))
+
+
+def make_task_runner(kind=TASK_RUNNER, max_workers=MAX_WORKERS):
+    """Task runner for the flow; process pools come from prefect-dask when it is installed."""
+    if kind == "sequential":
+        return SequentialTaskRunner()
+    if kind == "processes":
+        try:
+            from prefect_dask import DaskTaskRunner
+        except ImportError:
+            print("⚠️ prefect-dask is not installed; running tasks on threads instead.")
+        else:
+            return DaskTaskRunner(cluster_kwargs={"n_workers": max_workers, "processes": True, "threads_per_worker": 1})
+    return ConcurrentTaskRunner()
+
+
+async def _ensure_concurrency_limits(limits):
+    async with get_client() as client:
+        for tag, limit in limits.items():
+            await client.create_concurrency_limit(tag=tag, concurrency_limit=limit)
+
+
+def ensure_concurrency_limits(limits=CONCURRENCY_LIMITS):
+    """Creates (or resizes) the tag-based concurrency limits on the Prefect API.
+
+    Safe to call from inside a running flow: run_sync moves the client onto
+    its own event loop thread when one is already running.
+    """
+    run_sync(_ensure_concurrency_limits(limits))
+    for tag, limit in limits.items():
+        print(f"🚦 Concurrency limit {tag}: {limit}")
+
+@task(tags=[FETCH_TAG])
 def fetch_h1b_data(section, url):
     """Scrapes H1BData.info for a specific section."""
     print(f"🔄 Fetching {section} data...")
 
-    response = requests.get(url, headers=HEADERS)
+    try:
+        response = HTTP_CACHE.get(url, headers=HEADERS)
+    except requests.RequestException as e:
+        print(f"❌ Failed to fetch {section}! {type(e).__name__}: {e}")
+        return None
+    if response.status_code == 200 and not response.changed:
+        print(f"⏭️ {section} unchanged since the last run, skipping parse and write.")
+        return None
     if response.status_code != 200:
         print(f"❌ Failed to fetch {section}! Status Code: {response.status_code}")
         return None
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    table = soup.find("table")
+    # Parse only the first table, straight into columns (no full-page soup)
+    df = tables.table_frame(response.text)
 
-    if not table:
+    if df is None:
         print(f"❌ No table found for {section}! Website structure might have changed.")
         return None
 
     print(f"✅ Table Found for {section}! Extracting data...")
 
-    # Extract table headers
-    headers = [th.text.strip().lower().replace(" ", "_") for th in table.find_all("th")]
-
-    # Extract rows
-    data = []
-    for row in table.find_all("tr")[1:]:  # Skip header row
-        cols = row.find_all("td")
-        data.append([col.text.strip() for col in cols])
-
-    # Convert to DataFrame
-    df = pd.DataFrame(data, columns=headers)
+    # Header names as stored in the database schema
+    df = tables.snake_headers(df)
 
     # Rename columns based on database schema
     rename_map = {
@@ -74,30 +115,29 @@ def fetch_h1b_data(section, url):
 
     # Convert numeric columns safely
     if "filings" in df.columns:
-        df["filings"] = df["filings"].str.replace(",", "").fillna("0").astype(int)
+        df["filings"] = tables.to_number(df["filings"], int).fillna(0).astype(int)
 
     if "avg_salary" in df.columns:
-        df["avg_salary"] = df["avg_salary"].str.replace(r"[\$,]", "", regex=True).fillna("0").astype(float)
+        df["avg_salary"] = tables.to_number(df["avg_salary"]).fillna(0)
 
     # Add timestamp
     df["last_updated"] = datetime.now(timezone.utc)
+    # The save task may run in another process; it commits exactly the body parsed here
+    df.attrs["sha256"] = response.sha256
 
     print(f"\n📊 {section} Data - {df.shape[0]} rows extracted:")
     print(df.head())
 
     return df
 
-@task
+@task(tags=[SAVE_TAG])
 def save_to_postgres(df, table_name):
     """Pushes the DataFrame to PostgreSQL with real-time updates."""
     if df is None or df.empty:
         print(f"❌ No data to save for {table_name}. Skipping database update.")
-        return
+        return None
 
     try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        cursor = conn.cursor()
-
         # Expected columns for each table
         column_mapping = {
             "h1b_top_companies": ["company_name", "filings", "avg_salary", "last_updated"],
@@ -111,53 +151,54 @@ def save_to_postgres(df, table_name):
         # Check if table_name exists in mapping
         if table_name not in column_mapping:
             print(f"⚠️ Warning: Table {table_name} not found in schema mapping. Skipping insert.")
-            return
+            return None
 
         # Ensure DataFrame has the correct columns
         expected_columns = column_mapping[table_name]
         df = df[expected_columns]
 
-        # Convert DataFrame to a list of tuples
-        records = [tuple(row) for row in df.to_numpy()]
-
-        # SQL Query for Insertion with Conflict Handling
-        placeholders = ", ".join(["%s"] * len(expected_columns))
-        columns_sql = ", ".join(expected_columns)
-
         # Unique key for conflict resolution
         unique_column = "company_name" if "company_name" in df.columns else "job_title" if "job_title" in df.columns else "city_name"
 
-        insert_query = f"""
-        INSERT INTO {table_name} ({columns_sql})
-        VALUES ({placeholders})
-        ON CONFLICT ({unique_column}) DO UPDATE
-        SET filings = EXCLUDED.filings,
-            avg_salary = EXCLUDED.avg_salary,
-            last_updated = EXCLUDED.last_updated;
-        """
-
-        cursor.executemany(insert_query, records)
+        # Batched upsert of new/changed rows only, on a pooled connection (tasks share the process pool)
+        with db.connection() as conn, conn.cursor() as cursor:
+            inserted, updated, skipped = changes.upsert_changed(cursor, table_name, df, expected_columns, unique_column)
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+        HTTP_CACHE.commit(H1B_URLS[table_name], sha256=df.attrs.get("sha256"))
 
-        print(f"✅ Real-time data updated in PostgreSQL for {table_name}!")
+        print(f"✅ Real-time data updated in PostgreSQL for {table_name}! ({inserted} inserted, {updated} updated, {skipped} unchanged)")
+        return {"inserted": inserted, "updated": updated, "skipped": skipped}
 
     except Exception as e:
         print(f"❌ Database Error for {table_name}: {e}")
+        return None
 
 
 
-@flow
+@flow(task_runner=make_task_runner())
 def h1b_scraper_flow():
     """Prefect Flow to scrape H1B data and store it in PostgreSQL."""
     print("\n🔄 Running Real-Time H1B Data Update...")
 
-    for section, url in H1B_URLS.items():
-        df = fetch_h1b_data(section, url)
-        if df is not None:
-            save_to_postgres(df, section)
+    # Deployments import the flow without running __main__, so the limits are created here
+    ensure_concurrency_limits()
+    # The save tasks share one fingerprint table; create it before they run concurrently
+    with db.connection() as conn, conn.cursor() as cursor:
+        changes.ensure_fingerprint_table(cursor)
+
+    # Every fetch is submitted at once; each save waits only on its own fetch future
+    fetches = {section: fetch_h1b_data.submit(section, url) for section, url in H1B_URLS.items()}
+    saves = [save_to_postgres.submit(future, section) for section, future in fetches.items()]
+
+    summary = {"inserted": 0, "updated": 0, "skipped": 0}
+    for future in saves:
+        counts = future.result(raise_on_failure=False)  # a failed section must not sink the others
+        if isinstance(counts, dict):
+            for k, v in counts.items():
+                summary[k] += v
+
+    print(f"🧾 Run summary: {summary['inserted']} inserted, {summary['updated']} updated, {summary['skipped']} unchanged rows skipped")
+    return summary
 
 if __name__ == "__main__":
     h1b_scraper_flow()
@@ -0,0 +1,94 @@
+"""Read-side queries over the fiscal-year partitioned h1b_visa_data table.
+
+Every query that can be narrowed by year passes the years as a literal
+predicate on fiscal_year, so PostgreSQL prunes the other partitions at plan
+time and only the employer/state indexes of the matching years are probed.
+"""
+import numbers
+import pandas as pd
+import db
+
+# Weighted by petition counts; Bloomberg registrations have no counts and are left out
+APPROVED = "COALESCE(initial_approvals, 0) + COALESCE(continuing_approvals, 0)"
+DENIED = "COALESCE(initial_denials, 0) + COALESCE(continuing_denials, 0)"
+
+
+def _frame(cursor):
+    return pd.DataFrame(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+
+
+def _filters(years=None, state=None, employer=None, status=None):
+    clauses, params = [], []
+    if years is not None:
+        years = [int(years)] if isinstance(years, (numbers.Integral, str)) else [int(y) for y in years]
+        clauses.append("fiscal_year = ANY(%s)")
+        params.append(years)
+    for col, value in (("state", state), ("employer_name", employer), ("approval_status", status)):
+        if value is not None:
+            clauses.append(f"{col} = %s")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def employer_history(employer, years=None, **db_params):
+    """Per-year petition counts and weighted approval rate for one employer."""
+    where, params = _filters(years, employer=employer)
+    with db.connection(**db_params) as conn, conn.cursor() as cursor:
+        cursor.execute(f"""
+        SELECT fiscal_year,
+               count(*) AS records,
+               sum({APPROVED}) AS approvals,
+               sum({DENIED}) AS denials,
+               sum({APPROVED})::float / NULLIF(sum({APPROVED}) + sum({DENIED}), 0) AS approval_rate
+        FROM h1b_visa_data{where}
+        GROUP BY fiscal_year
+        ORDER BY fiscal_year
+        """, params)
+        return _frame(cursor)
+
+
+def top_employers(years, state=None, limit=10, **db_params):
+    """Employers with the most approved petitions in the given fiscal year(s), optionally in one state."""
+    where, params = _filters(years, state=state)
+    with db.connection(**db_params) as conn, conn.cursor() as cursor:
+        cursor.execute(f"""
+        SELECT employer_name,
+               sum({APPROVED}) AS approvals,
+               sum({DENIED}) AS denials
+        FROM h1b_visa_data{where}
+        GROUP BY employer_name
+        ORDER BY approvals DESC NULLS LAST, employer_name
+        LIMIT %s
+        """, params + [limit])
+        return _frame(cursor)
+
+
+def approval_rate(years=None, state=None, employer=None, **db_params):
+    """Weighted approval rate (approved petitions / decided petitions), or None if nothing matched."""
+    where, params = _filters(years, state=state, employer=employer)
+    with db.connection(**db_params) as conn, conn.cursor() as cursor:
+        cursor.execute(f"""
+        SELECT sum({APPROVED})::float / NULLIF(sum({APPROVED}) + sum({DENIED}), 0)
+        FROM h1b_visa_data{where}
+        """, params)
+        return cursor.fetchone()[0]
+
+
+def status_counts(years=None, state=None, **db_params):
+    """Row counts per approval_status, including Bloomberg registrations."""
+    where, params = _filters(years, state=state)
+    with db.connection(**db_params) as conn, conn.cursor() as cursor:
+        cursor.execute(f"""
+        SELECT approval_status, count(*) AS records
+        FROM h1b_visa_data{where}
+        GROUP BY approval_status
+        ORDER BY records DESC
+        """, params)
+        return _frame(cursor)
+
+
+def explain(sql, params=(), **db_params):
+    """EXPLAIN output for a query, handy for checking that partitions are pruned."""
+    with db.connection(**db_params) as conn, conn.cursor() as cursor:
+        cursor.execute("EXPLAIN " + sql, params)
+        return "\n".join(r[0] for r in cursor.fetchall())
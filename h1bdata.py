@@ -1,19 +1,14 @@
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import psycopg2
+import tables
+import db
+import changes
+import fetcher
+import http_cache
+import http_client
 from datetime import datetime, timezone
+import os
 import time
 
-# PostgreSQL Connection Parameters
-DB_PARAMS = {
-    "dbname": "visa_tracker2",
-    "user": "postgres",
-    "password": "postgres",
-    "host": "localhost",
-    "port": "5432",
-}
-
 # Define URLs for each section
 H1B_URLS = {
     "h1b_top_companies": "https://h1bdata.info/topcompanies.php",
@@ -24,38 +19,43 @@ H1B_URLS = {
     "h1b_highest_paid_cities": "https://h1bdata.info/highestpaidcity.php",
 }
 
+# "local" derives the same six tables from our own LCA rollups instead of scraping
+RANKINGS_SOURCE = os.environ.get("H1B_RANKINGS_SOURCE", "scrape")
+
 # Headers to mimic a browser request
 HEADERS = {"User-Agent": "Mozilla/5.0"}
 
-def fetch_h1b_data(section, url):
+def fetch_h1b_data(section, url, cache=None):
     """Scrapes H1BData.info for a specific section."""
     print(f"🔄 Fetching {section} data...")
 
-    response = requests.get(url, headers=HEADERS)
+    try:
+        response = http_client.get(url, headers=HEADERS) if cache is None else cache.get(url, headers=HEADERS)
+    except requests.RequestException as e:
+        print(f"❌ Failed to fetch {section}! {type(e).__name__}: {e}")
+        return None
+    if cache is not None and not response.changed:
+        print(f"⏭️ {section} unchanged since the last run")
+        return None
+    return parse_h1b_page(section, response)
+
+def parse_h1b_page(section, response):
+    """Turns a fetched section page (requests or httpx response) into a DataFrame, or None."""
     if response.status_code != 200:
         print(f"❌ Failed to fetch {section}! Status Code: {response.status_code}")
         return None
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    table = soup.find("table")
+    # Parse only the first table, straight into columns (no full-page soup)
+    df = tables.table_frame(response.text)
 
-    if not table:
+    if df is None:
         print(f"❌ No table found for {section}! Website structure might have changed.")
         return None
 
     print(f"✅ Table Found for {section}! Extracting data...")
 
-    # Extract table headers
-    headers = [th.text.strip().lower().replace(" ", "_") for th in table.find_all("th")]
-
-    # Extract rows
-    data = []
-    for row in table.find_all("tr")[1:]:  # Skip header row
-        cols = row.find_all("td")
-        data.append([col.text.strip() for col in cols])
-
-    # Convert to DataFrame
-    df = pd.DataFrame(data, columns=headers)
+    # Header names as stored in the database schema
+    df = tables.snake_headers(df)
 
     # Rename columns based on database schema
     rename_map = {
@@ -72,10 +72,10 @@ def fetch_h1b_data(section, url):
 
     # Convert numeric columns safely
     if "filings" in df.columns:
-        df["filings"] = df["filings"].str.replace(",", "").fillna("0").astype(int)
+        df["filings"] = tables.to_number(df["filings"], int).fillna(0).astype(int)
 
     if "avg_salary" in df.columns:
-        df["avg_salary"] = df["avg_salary"].str.replace(r"[\$,]", "", regex=True).fillna("0").astype(float)
+        df["avg_salary"] = tables.to_number(df["avg_salary"]).fillna(0)
 
     # **✅ Fix: Store UTC timestamp correctly**
     df["last_updated"] = datetime.now(timezone.utc)
@@ -89,12 +89,9 @@ def save_to_postgres(df, table_name):
     """Pushes the DataFrame to PostgreSQL with real-time updates."""
     if df is None or df.empty:
         print(f"❌ No data to save for {table_name}. Skipping database update.")
-        return
+        return None
 
     try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        cursor = conn.cursor()
-
         # Define unique constraint column
         unique_column_mapping = {
             "h1b_top_companies": "company_name",
@@ -119,39 +116,45 @@ def save_to_postgres(df, table_name):
 
         df = df[expected_columns]
 
-        # SQL Query for Insertion with Conflict Handling
-        placeholders = ", ".join(["%s"] * len(expected_columns))
-        columns_sql = ", ".join(expected_columns)
-
-        for row in df.itertuples(index=False, name=None):
-            cursor.execute(
-                f"""
-                INSERT INTO {table_name} ({columns_sql})
-                VALUES ({placeholders})
-                ON CONFLICT ({unique_column}) DO UPDATE
-                SET filings = EXCLUDED.filings,
-                    avg_salary = EXCLUDED.avg_salary,
-                    last_updated = EXCLUDED.last_updated;
-                """,
-                row,
-            )
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-        print(f"✅ Real-time data updated in PostgreSQL for {table_name}!")
+        # Batched upsert of new/changed rows only; unchanged rows keep their last_updated
+        with db.connection() as conn, conn.cursor() as cursor:
+            inserted, updated, skipped = changes.upsert_changed(cursor, table_name, df, expected_columns, unique_column)
+
+        print(f"✅ Real-time data updated in PostgreSQL for {table_name}! ({inserted} inserted, {updated} updated, {skipped} unchanged)")
+        return {"inserted": inserted, "updated": updated, "skipped": skipped}
 
     except Exception as e:
         print(f"❌ Database Error for {table_name}: {e}")
+        return None
 
 if __name__ == "__main__":
+    if RANKINGS_SOURCE == "local":
+        # Nothing to poll: the rankings are refreshed by `rollups.py <LCA files>` and at the end of each
+        # uscics_csv load; this only recomputes them once from the partials already stored
+        import rollups
+        rollups.main([])
+        raise SystemExit
+
+    # Conditional GETs: unchanged sections cost one header exchange and skip parse/write
+    cache = http_cache.HttpCache(consumer="h1bdata")
+    # Created once here, not by the concurrent section saves
+    with db.connection() as conn, conn.cursor() as cursor:
+        changes.ensure_fingerprint_table(cursor)
     while True:
         print("\n🔄 Running Real-Time H1B Data Update...")
-        for section, url in H1B_URLS.items():
-            df = fetch_h1b_data(section, url)
-            if df is not None:
-                save_to_postgres(df, section)
+        summary = {"inserted": 0, "updated": 0, "skipped": 0}
+
+        def save(section, df):
+            counts = save_to_postgres(df, section)
+            if counts is not None:
+                cache.commit(H1B_URLS[section])
+            for k, v in (counts or {}).items():
+                summary[k] += v
+
+        # All sections in flight at once; each frame is saved as soon as it is parsed
+        fetcher.run_all(H1B_URLS, parse_h1b_page, on_result=save, cache=cache)
+
+        print(f"🧾 Cycle summary: {summary['inserted']} inserted, {summary['updated']} updated, {summary['skipped']} unchanged rows skipped")
 
         print("⏳ Sleeping for 10 minutes before next update...")
         time.sleep(600)  # Run every 10 minutes
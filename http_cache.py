@@ -0,0 +1,147 @@
+"""On-disk conditional-GET cache shared by the scrapers.
+
+Each URL keeps its last body plus the validators the server sent (ETag,
+Last-Modified) and a sha256 of the body. Requests carry If-None-Match /
+If-Modified-Since; a 304 is answered from the stored body. A response is
+`changed` only when its body hash differs from the last body its consumer
+committed, so callers skip parsing and writing for unchanged pages, and a
+page whose save failed is processed again on the next run. Scrapers that
+share URLs (h1bdata, track, the Prefect flow) each keep their own
+committed digest, and a commit records the body that instance served, not
+whatever another process stored since.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import http_client
+
+CACHE_DIR = os.environ.get("H1B_HTTP_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache"))
+
+
+class CachedResponse:
+    """The parts of a requests/httpx response the scrapers use, plus cache state."""
+
+    def __init__(self, url, status_code, content, encoding, headers, changed, from_cache, sha256=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.headers = headers
+        self.changed = changed
+        self.from_cache = from_cache
+        self.sha256 = sha256
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class HttpCache:
+    """Validators and bodies per URL under `directory`, written atomically.
+
+    `consumer` names the scraper whose processing commit() records.
+    """
+
+    def __init__(self, directory=CACHE_DIR, consumer="default"):
+        self.directory = directory
+        self.consumer = consumer
+        self._served = {}  # url -> sha256 of the body this instance last handed out
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()[:32]
+        base = os.path.join(self.directory, key)
+        return base + ".body", base + ".json"
+
+    def _write(self, path, data):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+
+    def entry(self, url):
+        """Stored metadata for url, or None."""
+        try:
+            with open(self._paths(url)[1]) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _committed(self, meta):
+        committed = meta.get("committed")
+        return committed.get(self.consumer) if isinstance(committed, dict) else None
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since for url's stored validators (empty when nothing is cached)."""
+        meta = self.entry(url)
+        if meta is None or not os.path.exists(self._paths(url)[0]):
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def store(self, url, status_code, headers, content, encoding=None):
+        """Records a response (from requests or httpx) and returns it as a CachedResponse.
+
+        A 304 is replaced by the stored body with status 200. Other non-200
+        responses pass through untouched and count as changed, so callers
+        keep their usual error handling.
+        """
+        body_path, meta_path = self._paths(url)
+        meta = self.entry(url) or {}
+        if status_code == 304 and meta:
+            try:
+                with open(body_path, "rb") as fh:
+                    content = fh.read()
+            except OSError:
+                content = None
+            if content is not None:
+                digest = hashlib.sha256(content).hexdigest()
+                self._served[url] = digest
+                changed = digest != self._committed(meta)
+                return CachedResponse(url, 200, content, meta.get("encoding"), headers, changed, True, digest)
+        if status_code != 200:
+            return CachedResponse(url, status_code, content or b"", encoding, headers, True, False)
+
+        digest = hashlib.sha256(content).hexdigest()
+        if digest != meta.get("sha256"):
+            self._write(body_path, content)
+        meta.update({
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "sha256": digest,
+            "encoding": encoding,
+        })
+        self._write(meta_path, json.dumps(meta).encode())
+        self._served[url] = digest
+        return CachedResponse(url, 200, content, encoding, headers, digest != self._committed(meta), False, digest)
+
+    def get(self, url, session=None, **kwargs):
+        """Conditional GET through `session` (default: the shared http_client session)."""
+        headers = dict(kwargs.pop("headers", None) or {})
+        headers.update(self.conditional_headers(url))
+        response = (session or http_client.session()).get(url, headers=headers, **kwargs)
+        return self.store(url, response.status_code, response.headers, response.content, response.encoding)
+
+    def commit(self, *urls, sha256=None):
+        """Marks the body this instance last served for each url as processed by its consumer.
+
+        Until then the url keeps reporting `changed`. A body another process
+        stored in the meantime stays uncommitted. `sha256` (a response's
+        digest) names the processed body instead, for a caller that fetched
+        it in another process.
+        """
+        for url in urls:
+            digest = sha256 or self._served.get(url)
+            meta = self.entry(url)
+            if digest is None or meta is None:
+                continue
+            committed = meta.get("committed")
+            meta["committed"] = {**(committed if isinstance(committed, dict) else {}), self.consumer: digest}
+            self._write(self._paths(url)[1], json.dumps(meta).encode())
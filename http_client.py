@@ -0,0 +1,96 @@
+"""Shared HTTP client for the scrapers.
+
+One requests.Session per process with per-host keep-alive pools, a
+bounded (connect, read) timeout on every request and jittered exponential
+retries for connection errors, timeouts and 429/5xx responses. Paginated
+scrapes reuse the same TCP/TLS connection for every page, and a stalled
+server costs at most a few timeouts instead of hanging the cycle.
+"""
+import os
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = float(os.environ.get("H1B_HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("H1B_HTTP_READ_TIMEOUT", "30"))
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+RETRIES = int(os.environ.get("H1B_HTTP_RETRIES", "3"))
+BACKOFF = 0.5  # seconds; attempt n waits about BACKOFF * 2**n
+BACKOFF_MAX = 30.0
+RETRY_STATUS = (429, 500, 502, 503, 504)
+POOL_HOSTS = 10  # hosts kept in the pool manager
+POOL_SIZE = 10  # keep-alive connections per host
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def backoff_delay(attempt, base=BACKOFF, cap=BACKOFF_MAX):
+    """Exponential delay for retry `attempt` (0-based) with jitter, so clients don't retry in lockstep."""
+    delay = min(cap, base * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+class JitteredRetry(Retry):
+    """urllib3 Retry whose backoff comes from backoff_delay (works on urllib3 1.26 and 2.x)."""
+
+    def get_backoff_time(self):
+        retries = len(self.history)
+        return backoff_delay(retries - 1, self.backoff_factor) if retries else 0
+
+
+class TimeoutSession(requests.Session):
+    """Session that applies TIMEOUT to any request made without an explicit timeout."""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+def make_session(retries=RETRIES, backoff=BACKOFF, pool_hosts=POOL_HOSTS, pool_size=POOL_SIZE, headers=HEADERS):
+    """A new pooled, retrying session (most callers want the shared one from session())."""
+    retry = JitteredRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # the final 5xx comes back as a response, as before
+    )
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=retry)
+    s = TimeoutSession()
+    s.headers.update(headers)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def session():
+    """Process-wide shared session, created on first use (a forked worker gets its own)."""
+    pid = os.getpid()
+    with _lock:
+        s = _sessions.get(pid)
+        if s is None:
+            s = _sessions[pid] = make_session()
+        return s
+
+
+def get(url, **kwargs):
+    """GET through the shared session; raises requests.RequestException once retries are exhausted."""
+    return session().get(url, **kwargs)
+
+
+def close_all():
+    """Closes this process's session and its pooled connections."""
+    with _lock:
+        s = _sessions.pop(os.getpid(), None)
+    if s is not None:
+        s.close()
@@ -1,18 +1,10 @@
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-import psycopg2
+import tables
+import db
+import http_cache
 import time
 
-# PostgreSQL Connection Parameters
-DB_PARAMS = {
-    "dbname": "visa_tracker2",
-    "user": "postgres",
-    "password": "postgres",
-    "host": "localhost",
-    "port": "5432",
-}
-
 # Direct URLs for H-1B Visa Data
 H1B_URLS = [
     "https://www.myvisajobs.com/reports/h1b/",  # Top 200 H-1B Employers
@@ -28,88 +20,77 @@ HEADERS = {
 
 MAX_PAGES = 20  # Limit the scraper to 100 pages
 
+# Conditional GETs: pages unchanged since the last successful save are not re-parsed or re-written
+HTTP_CACHE = http_cache.HttpCache(consumer="new_check")
+
 def fetch_h1b_data(url):
     """Scrapes H-1B Visa Sponsorship data from a given MyVisaJobs URL."""
     print(f"🔄 Fetching data from: {url}")
 
-    data = []
+    # Fetch every page first (conditionally) so unchanged runs never reach the parser
+    pages = []
     page = 1
     while page <= MAX_PAGES:  # Limit to 100 pages
         page_url = f"{url}?P={page}"
-        print(f"📄 Scraping page {page}/{MAX_PAGES}...")
-
-        response = requests.get(page_url, headers=HEADERS)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Find the table
-        table = soup.find("table")
-        if not table:
-            print("❌ No more data available or unable to locate the table.")
-            break
+        print(f"📄 Fetching page {page}/{MAX_PAGES}...")
 
-        # Extract rows
-        for row in table.find_all("tr")[1:]:  # Skip header row
-            cols = row.find_all("td")
-            if len(cols) < 4:
-                continue  # Skip if row does not have expected columns
+        try:
+            response = HTTP_CACHE.get(page_url, headers=HEADERS)
+        except requests.RequestException as e:
+            print(f"❌ Failed to fetch page {page}! {type(e).__name__}: {e}")
+            return None  # a partial ranking would overwrite the full one
+        pages.append(response)
+        if "<table" not in response.text.lower():
+            break  # past the last page
 
-            try:
-                rank_text = cols[0].text.strip()
-                employer = cols[1].text.strip()
-                lca_count_text = cols[2].text.strip().replace(",", "")
-                avg_salary_text = cols[3].text.strip().replace("$", "").replace(",", "")
-
-                # Convert extracted values safely
-                rank = int(rank_text) if rank_text.isdigit() else None
-                lca_count = int(lca_count_text) if lca_count_text.isdigit() else None
-                avg_salary = float(avg_salary_text) if avg_salary_text.replace(".", "").isdigit() else None
+        page += 1
+        time.sleep(2)  # Delay to prevent blocking
 
-                if rank and employer and lca_count and avg_salary:
-                    data.append([rank, employer, lca_count, avg_salary])
+    if not any(r.changed for r in pages):
+        print("⏭️ No page changed since the last run. Skipping update.")
+        return None
 
-            except Exception as e:
-                print(f"⚠️ Skipping row due to error: {e}")
+    frames = []
+    for page, response in enumerate(pages, start=1):
+        print(f"📄 Scraping page {page}/{len(pages)}...")
 
-        page += 1
-        time.sleep(2)  # Delay to prevent blocking
+        # Parse only the table, with the numeric columns converted in one pass
+        rows = tables.sponsor_rows(response.text)
+        if rows is None:
+            print("❌ No more data available or unable to locate the table.")
+            break
+        frames.append(rows)
 
-    return pd.DataFrame(data, columns=["Rank", "Employer", "Number of LCA", "Average Salary"])
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=tables.SPONSOR_COLUMNS)
+    df.attrs["urls"] = [r.url for r in pages]
+    return df
 
 def save_to_postgres(df):
     """Stores the H-1B Visa data into PostgreSQL."""
     try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        cursor = conn.cursor()
-
-        # Create Table if it doesn't exist
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS h1b_visa_sponsorships (
-            id SERIAL PRIMARY KEY,
-            rank INT UNIQUE,
-            employer TEXT,
-            lca_count INT,
-            average_salary NUMERIC,
-            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-
-        # Insert or Update Data
-        for _, row in df.iterrows():
+        with db.connection() as conn, conn.cursor() as cursor:
+            # Create Table if it doesn't exist
             cursor.execute("""
-            INSERT INTO h1b_visa_sponsorships (rank, employer, lca_count, average_salary, last_updated)
-            VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
-            ON CONFLICT (rank) DO UPDATE
-            SET employer = EXCLUDED.employer,
-                lca_count = EXCLUDED.lca_count,
-                average_salary = EXCLUDED.average_salary,
-                last_updated = CURRENT_TIMESTAMP;
-            """, (row["Rank"], row["Employer"], row["Number of LCA"], row["Average Salary"]))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+            CREATE TABLE IF NOT EXISTS h1b_visa_sponsorships (
+                id SERIAL PRIMARY KEY,
+                rank INT UNIQUE,
+                employer TEXT,
+                lca_count INT,
+                average_salary NUMERIC,
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+
+            # Insert or Update Data (last_updated defaults to CURRENT_TIMESTAMP on insert)
+            upsert = db.prepare_upsert(
+                cursor, "h1b_visa_sponsorships", ["rank", "employer", "lca_count", "average_salary"], "rank",
+                extra_set="last_updated = CURRENT_TIMESTAMP",
+            )
+            rows = df[["Rank", "Employer", "Number of LCA", "Average Salary"]].itertuples(index=False, name=None)
+            db.execute_prepared(cursor, upsert, rows)
 
         print("✅ H-1B Visa Data successfully saved to PostgreSQL!")
+        return True
 
     except Exception as e:
         print(f"❌ Database Error: {e}")
@@ -117,5 +98,5 @@ def save_to_postgres(df):
 if __name__ == "__main__":
     for url in H1B_URLS:
         df = fetch_h1b_data(url)
-        if df is not None and not df.empty:
-            save_to_postgres(df)
+        if df is not None and not df.empty and save_to_postgres(df):
+            HTTP_CACHE.commit(*df.attrs["urls"])
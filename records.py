@@ -0,0 +1,84 @@
+
+import numpy as np
+import pandas as pd
+from etl.bitmap import bitmap_rows
+
+PAGE_SIZE = 50
+# Each sortable column costs two int32 arrays (8 bytes/row), so only offer the useful ones
+SORT_COLUMNS = ['employer', 'job_title', 'state', 'decision_year', 'case_status', 'wage_annual']
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+def sort_rank(s: pd.Series):
+    """Stable ascending permutation of a column (missing values last) and each row's position in it."""
+    codes, uniques = pd.factorize(s, sort=True)
+    codes = np.where(codes < 0, len(uniques), codes)
+    perm = np.argsort(codes, kind='stable').astype(np.int32)
+    rank = np.empty(len(perm), dtype=np.int32)
+    rank[perm] = np.arange(len(perm), dtype=np.int32)
+    return perm, rank
+
+class RecordPager:
+    """Cursor-paginated, server-sorted view over a frame.
+
+    One argsort permutation per sortable column is computed up front. A page
+    is the next `size` rows of that order that are set in the filter bitmap;
+    the cursor is the sort position of the last row served. Dense filters
+    walk the permutation from the cursor, sparse ones rank only the matching
+    rows, so neither path touches more than a few pages' worth of work for
+    broad filters nor the full frame for narrow ones.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns=None):
+        self.df = df
+        self.n = len(df)
+        self.perm, self.rank = {}, {}
+        for c in columns or [c for c in SORT_COLUMNS if c in df.columns]:
+            self.perm[c], self.rank[c] = sort_rank(df[c])
+
+    @staticmethod
+    def count(bitmap: np.ndarray) -> int:
+        return int(_POPCOUNT[bitmap].sum())
+
+    def page(self, bitmap: np.ndarray, sort_by: str, ascending: bool = True, cursor: int = None, size: int = PAGE_SIZE):
+        """(rows frame, next cursor or None) for the page after `cursor` in the requested order."""
+        perm, rank = self.perm[sort_by], self.rank[sort_by]
+        matched = self.count(bitmap)
+        if matched * 64 >= self.n:
+            pos = self._scan(bitmap, perm, ascending, cursor, size)
+        else:
+            pos = self._ranked(bitmap, rank, ascending, cursor, size)
+        next_cursor = int(pos[-1]) if len(pos) == size else None
+        return self.df.iloc[perm[pos]], next_cursor
+
+    def _scan(self, bitmap, perm, ascending, cursor, size):
+        # walk the sort order from the cursor in blocks, keeping rows whose bit is set
+        step = max(size * 8, 1024)
+        found = []
+        start = (0 if cursor is None else cursor + 1) if ascending else (self.n - 1 if cursor is None else cursor - 1)
+        while sum(len(f) for f in found) < size:
+            if ascending:
+                if start >= self.n:
+                    break
+                pos = np.arange(start, min(start + step, self.n))
+                start += step
+            else:
+                if start < 0:
+                    break
+                pos = np.arange(start, max(start - step, -1), -1)
+                start -= step
+            rows = perm[pos].astype(np.int64)
+            hit = (bitmap[rows >> 3] >> (7 - (rows & 7))) & 1
+            found.append(pos[hit.astype(bool)])
+        return np.concatenate(found)[:size] if found else np.empty(0, dtype=np.int64)
+
+    def _ranked(self, bitmap, rank, ascending, cursor, size):
+        # sparse filter: rank just the matching rows
+        keys = rank[bitmap_rows(bitmap)].astype(np.int64)
+        if cursor is not None:
+            keys = keys[keys > cursor] if ascending else keys[keys < cursor]
+        if not ascending:
+            keys = -keys
+        if len(keys) > size:
+            keys = np.partition(keys, size - 1)[:size]
+        keys = np.sort(keys)
+        return keys if ascending else -keys
@@ -0,0 +1,171 @@
+"""Locally computed h1bdata.info-style rankings from cleaned LCA records.
+
+Each ingested LCA file contributes per-(dimension, name, year) partial sums
+to h1b_rollup_totals; re-ingesting a file replaces only its own partials.
+The six ranking tables are then refreshed from those partials in SQL and
+keep the scraped shape (key, filings, avg_salary, last_updated), so the
+dashboard reads them exactly like the h1bdata.py output.
+"""
+import argparse
+import os
+import pandas as pd
+import db
+import changes
+
+ROLLUP_TABLE = "h1b_rollup_totals"
+TOP_N = 100  # rows kept per ranking
+MIN_FILINGS = 10  # highest-paid rankings ignore names with fewer filings
+
+# dimension -> (cleaned LCA columns forming the name, key column in the ranking tables)
+DIMENSIONS = {
+    "company": (["employer"], "company_name"),
+    "job": (["job_title"], "job_title"),
+    "city": (["city", "state"], "city_name"),
+}
+# ranking table -> (dimension, order by)
+RANKINGS = {
+    "h1b_top_companies": ("company", "filings"),
+    "h1b_top_jobs": ("job", "filings"),
+    "h1b_top_cities": ("city", "filings"),
+    "h1b_highest_paid_companies": ("company", "avg_salary"),
+    "h1b_highest_paid_jobs": ("job", "avg_salary"),
+    "h1b_highest_paid_cities": ("city", "avg_salary"),
+}
+
+
+def create_tables(cursor):
+    """Creates the partial-sum table and any ranking table that does not exist yet."""
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+        dimension TEXT,
+        name TEXT,
+        decision_year INT,
+        source_file TEXT,
+        filings BIGINT,
+        wage_sum DOUBLE PRECISION,
+        wage_n BIGINT,
+        PRIMARY KEY (dimension, decision_year, name, source_file)
+    )
+    """)
+    for table, (dimension, _) in RANKINGS.items():
+        key = DIMENSIONS[dimension][1]
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            {key} TEXT UNIQUE,
+            filings INT,
+            avg_salary NUMERIC,
+            last_updated TIMESTAMPTZ
+        )
+        """)
+
+
+def partial_sums(df):
+    """Per-(dimension, name, decision_year) filings, wage sum and wage count for one cleaned frame."""
+    wage = pd.to_numeric(df["wage_annual"], errors="coerce")
+    parts = []
+    for dimension, (columns, _) in DIMENSIONS.items():
+        name = df[columns[0]].astype(str)
+        for col in columns[1:]:
+            name = name + ", " + df[col].astype(str)
+        frame = pd.DataFrame({
+            "name": name.where(df[columns].notna().all(axis=1)),
+            "decision_year": df["decision_year"],
+            "wage": wage,
+        }).dropna(subset=["name", "decision_year"])
+        g = frame.groupby(["name", "decision_year"], sort=False)["wage"].agg(["size", "sum", "count"])
+        parts.append(g.reset_index().assign(dimension=dimension))
+    out = pd.concat(parts, ignore_index=True).rename(columns={"size": "filings", "sum": "wage_sum", "count": "wage_n"})
+    out["decision_year"] = out["decision_year"].astype(int)
+    return out[["dimension", "name", "decision_year", "filings", "wage_sum", "wage_n"]]
+
+
+def ingest_partials(cursor, df, source_file):
+    """Replaces the partial sums contributed by source_file with those of df. Returns the rows written."""
+    partials = partial_sums(df).assign(source_file=source_file)
+    cursor.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE source_file = %s", (source_file,))
+    columns = ["dimension", "name", "decision_year", "source_file", "filings", "wage_sum", "wage_n"]
+    inserted, _ = db.upsert_values(
+        cursor, ROLLUP_TABLE, columns, ["dimension", "decision_year", "name", "source_file"],
+        partials[columns].itertuples(index=False, name=None),
+    )
+    return inserted
+
+
+def refresh_rankings(cursor, year=None, top_n=TOP_N, min_filings=MIN_FILINGS):
+    """Recomputes the six ranking tables for `year` (default: latest year loaded).
+
+    Rows whose values did not change are left untouched (last_updated keeps
+    its value) and names that fell out of a ranking are removed. The
+    scraper's change-detection fingerprints for each table are cleared. Returns
+    {table: rows inserted or changed}.
+    """
+    if year is None:
+        cursor.execute(f"SELECT max(decision_year) FROM {ROLLUP_TABLE}")
+        year = cursor.fetchone()[0]
+        if year is None:
+            return {}
+    changed = {}
+    for table, (dimension, order) in RANKINGS.items():
+        key = DIMENSIONS[dimension][1]
+        having = "HAVING sum(filings) >= %(min_filings)s" if order == "avg_salary" else ""
+        cursor.execute(f"""
+        WITH ranked AS (
+            SELECT name, sum(filings) AS filings,
+                   round((sum(wage_sum) / NULLIF(sum(wage_n), 0))::numeric) AS avg_salary
+            FROM {ROLLUP_TABLE}
+            WHERE dimension = %(dimension)s AND decision_year = %(year)s
+            GROUP BY name
+            {having}
+            ORDER BY {order} DESC NULLS LAST, name
+            LIMIT %(top_n)s
+        ), dropped AS (
+            DELETE FROM {table} t WHERE NOT EXISTS (SELECT 1 FROM ranked r WHERE r.name = t.{key})
+        )
+        INSERT INTO {table} AS t ({key}, filings, avg_salary, last_updated)
+        SELECT name, filings, avg_salary, CURRENT_TIMESTAMP FROM ranked
+        ON CONFLICT ({key}) DO UPDATE
+        SET filings = EXCLUDED.filings, avg_salary = EXCLUDED.avg_salary, last_updated = EXCLUDED.last_updated
+        WHERE (t.filings, t.avg_salary) IS DISTINCT FROM (EXCLUDED.filings, EXCLUDED.avg_salary)
+        """, {"dimension": dimension, "year": year, "min_filings": min_filings, "top_n": top_n})
+        changed[table] = cursor.rowcount
+        changes.clear_fingerprints(cursor, table)  # the scraper's fingerprints no longer describe this table
+    return changed
+
+
+def refresh_for_years(cursor, years, **kwargs):
+    """Refreshes the rankings after an ingest that covered `years`.
+
+    The ranking tables show the latest year with partials; they are only
+    recomputed when `years` includes it. Returns {table: rows inserted or
+    changed}, or {} when nothing was refreshed.
+    """
+    create_tables(cursor)
+    cursor.execute(f"SELECT max(decision_year) FROM {ROLLUP_TABLE}")
+    year = cursor.fetchone()[0]
+    if year is None or year not in {int(y) for y in years}:
+        return {}
+    return refresh_rankings(cursor, year, **kwargs)
+
+
+def main(paths, year=None, cache_dir=None, **db_params):
+    """Ingests cleaned LCA files into the partial sums and refreshes the rankings in one transaction."""
+    from etl.clean import load_cleaned
+
+    with db.connection(**db_params) as conn, conn.cursor() as cursor:
+        create_tables(cursor)
+        for path in paths:
+            rows = ingest_partials(cursor, load_cleaned(path, cache_dir=cache_dir), os.path.basename(path))
+            print(f"📥 {os.path.basename(path)}: {rows:,} rollup rows")
+        changed = refresh_rankings(cursor, year)
+    for table, n in changed.items():
+        print(f"✅ {table}: {n} rows inserted or changed")
+    return changed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the h1b_top_* / h1b_highest_paid_* rankings from cleaned LCA files")
+    parser.add_argument("paths", nargs="*", help="LCA disclosure CSVs to (re)ingest; none just refreshes the rankings")
+    parser.add_argument("--year", type=int, help="decision year to rank (default: latest loaded)")
+    parser.add_argument("--cache-dir", default="data/.cache", help="Parquet cache used by clean.load_cleaned")
+    args = parser.parse_args()
+    main(args.paths, year=args.year, cache_dir=args.cache_dir)
@@ -0,0 +1,74 @@
+
+import re
+from bisect import bisect_left
+import numpy as np
+import pandas as pd
+
+class EmployerSearch:
+    """Prefix/substring lookup over distinct employer names, ranked by filing count.
+
+    Names are kept once, sorted by their lower-cased key, so a prefix query is
+    two bisects. Substring matches (only needed when prefixes run short) come
+    from a trigram -> key-id index: the posting lists of the query's trigrams
+    are intersected and only those candidates are checked. One- and
+    two-character queries have no trigram to look up; they scan all keys
+    joined into one string with a C-level regex search instead of a Python loop.
+    """
+
+    GRAM = 3
+    _SEP = '\x00'
+
+    def __init__(self, employers: pd.Series):
+        counts = employers.value_counts()
+        counts = counts[counts > 0]
+        keys = counts.index.astype(str).str.lower().to_numpy(dtype=object)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order].tolist()
+        self.names = counts.index.to_numpy(dtype=object)[order]
+        self.counts = counts.to_numpy()[order]
+
+        grams = {}
+        for i, key in enumerate(self.keys):
+            for g in {key[j:j + self.GRAM] for j in range(len(key) - self.GRAM + 1)}:
+                grams.setdefault(g, []).append(i)
+        self.grams = {g: np.array(ids, dtype=np.int64) for g, ids in grams.items()}
+        self._joined = self._SEP.join(self.keys)
+        self._starts = np.cumsum([0] + [len(k) + 1 for k in self.keys[:-1]])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _top(self, idx: np.ndarray, limit: int) -> np.ndarray:
+        if len(idx) > limit:
+            idx = idx[np.argpartition(-self.counts[idx], limit - 1)[:limit]]
+        return idx[np.argsort(-self.counts[idx], kind='stable')]
+
+    def _substring(self, q: str) -> np.ndarray:
+        """Sorted ids of the keys containing q."""
+        if len(q) < self.GRAM:
+            pos = [m.start() for m in re.finditer(re.escape(q), self._joined)]
+            return np.unique(np.searchsorted(self._starts, pos, side='right') - 1).astype(np.int64)
+        postings = [self.grams.get(q[j:j + self.GRAM]) for j in range(len(q) - self.GRAM + 1)]
+        if any(p is None for p in postings):
+            return np.empty(0, dtype=np.int64)
+        postings.sort(key=len)
+        ids = postings[0]
+        for p in postings[1:]:
+            ids = np.intersect1d(ids, p, assume_unique=True)
+        if len(q) > self.GRAM:  # trigrams present but maybe not contiguous
+            ids = ids[[q in self.keys[i] for i in ids.tolist()]] if len(ids) else ids
+        return ids
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """Up to `limit` names: prefix matches first, then substring matches, each by count."""
+        q = query.strip().lower()
+        if not q:
+            return self.names[self._top(np.arange(len(self.keys)), limit)].tolist()
+        lo = bisect_left(self.keys, q)
+        hi = bisect_left(self.keys, q + '\U0010ffff', lo)
+        hits = self._top(np.arange(lo, hi), limit)
+        if len(hits) < limit:
+            sub = self._substring(q)
+            sub = sub[(sub < lo) | (sub >= hi)]
+            hits = np.concatenate([hits, self._top(sub, limit - len(hits))])
+        return self.names[hits].tolist()
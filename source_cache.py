@@ -0,0 +1,67 @@
+"""Parquet caches of parsed source files, shared by the loaders.
+
+Each cached frame sits next to a JSON file recording the source's size,
+mtime and sha256. A source whose size and mtime match is served without
+being read; a touched source is confirmed with its content hash before the
+cache is thrown away.
+"""
+import hashlib
+import json
+import os
+
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MiB blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_paths(path, directory, suffix=""):
+    """(parquet, json) paths in `directory` for source `path`, unique per absolute source path."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    tag = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:8]
+    base = os.path.join(directory, f"{stem}-{tag}{suffix}")
+    return base + ".parquet", base + ".json"
+
+
+def write_json(path, obj):
+    """Writes obj as JSON atomically."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(obj, fh)
+    os.replace(tmp, path)
+
+
+def read_meta(path, meta_path, **expected):
+    """Cache metadata for source `path`, or None when it is missing, stale or any `expected` key differs."""
+    try:
+        with open(meta_path) as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if any(meta.get(k) != v for k, v in expected.items()):
+        return None
+    st = os.stat(path)
+    if (meta.get("size"), meta.get("mtime_ns")) != (st.st_size, st.st_mtime_ns):
+        # touched but maybe unchanged: confirm with the content hash
+        if meta.get("size") != st.st_size or meta.get("sha256") != file_sha256(path):
+            return None
+        meta["mtime_ns"] = st.st_mtime_ns
+        write_json(meta_path, meta)
+    return meta
+
+
+def write_cache(df, path, data_path, meta_path, **extra):
+    """Stores df as Parquet plus the source's size/mtime/sha256 (and `extra`) as JSON, both atomically."""
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    st = os.stat(path)
+    tmp = data_path + ".tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, data_path)
+    write_json(meta_path, {
+        "source": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+        "sha256": file_sha256(path), **extra,
+    })
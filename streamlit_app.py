@@ -1,20 +1,42 @@
 
 import streamlit as st, pandas as pd, altair as alt
 from etl.clean import load_cleaned
+from etl.cube import build_cube
+from etl.bitmap import BitmapIndex
+from etl.search import EmployerSearch
+from etl.records import PAGE_SIZE, RecordPager
+from etl.sketch import REL_ERROR
 
 st.set_page_config(page_title="International Student Visa Dashboard", page_icon="🧳", layout="wide")
 
 DATA_FILE = "data/H1B_Visa_Sponsors_2025.csv"
+CACHE_DIR = "data/.cache"
 
 st.title("International Student Visa Dashboard")
 
 @st.cache_data
 def load_data():
     try:
-        return load_cleaned(DATA_FILE)
+        return load_cleaned(DATA_FILE, cache_dir=CACHE_DIR)
     except Exception:
         return pd.DataFrame()
 
+@st.cache_resource
+def load_cube():
+    return build_cube(load_data())
+
+@st.cache_resource
+def load_index():
+    return BitmapIndex(load_data())
+
+@st.cache_resource
+def load_employer_search():
+    return EmployerSearch(load_data()["employer"])
+
+@st.cache_resource
+def load_pager():
+    return RecordPager(load_data())
+
 df = load_data()
 
 if df.empty:
@@ -26,28 +48,60 @@ else:
         year_sel = st.multiselect("Year", years, default=years)
         states = sorted(df["state"].unique())
         state_sel = st.multiselect("State", states, default=[])
-        employer_sel = st.multiselect("Employer", sorted(df["employer"].unique()), default=[])
+        # only the current picks plus the top matches for the query are sent to the browser
+        query = st.text_input("Search employer", placeholder="e.g. goog")
+        picked = st.session_state.get("employer_sel", [])
+        matches = load_employer_search().search(query, 50) if query else []
+        employer_sel = st.multiselect("Employer", list(dict.fromkeys(picked + matches)), key="employer_sel")
 
-    f = df[df["decision_year"].isin(year_sel)]
-    if state_sel: f = f[f["state"].isin(state_sel)]
-    if employer_sel: f = f[f["employer"].isin(employer_sel)]
+    cube = load_cube()
+    m = cube.mask(years=year_sel, states=state_sel or None, employers=employer_sel or None)
+    total = cube.total(m)
 
     c1, c2, c3 = st.columns(3)
-    c1.metric("Total Cases", f.shape[0])
-    if len(f) > 0:
-        c2.metric("Approval Rate", f"{(f['case_status']=='CERTIFIED').mean()*100:.1f}%")
-        c3.metric("Median Wage (Annualized)", f"${f['wage_annual'].median():,.0f}")
+    c1.metric("Total Cases", total)
+    if total > 0:
+        c2.metric("Approval Rate", f"{cube.approval_rate(m)*100:.1f}%")
+        c3.metric("Median Wage (Annualized)", f"${cube.median_wage(m):,.0f}")
     else:
         c2.metric("Approval Rate", "—")
         c3.metric("Median Wage (Annualized)", "—")
 
     st.subheader("Yearly Filing Trend")
-    yearly = f.groupby("decision_year").size().reset_index(name="count")
+    yearly = cube.yearly(m)
     st.altair_chart(alt.Chart(yearly).mark_line(point=True).encode(x="decision_year:O", y="count:Q"), use_container_width=True)
 
+    st.subheader("Wage Distribution (Annualized)")
+    if total > 0:
+        sketch = cube.wage_sketch(m)
+        p25, p50, p75 = sketch.quantiles([0.25, 0.5, 0.75])
+        st.caption(f"P25 ${p25:,.0f} · Median ${p50:,.0f} · P75 ${p75:,.0f} (±{REL_ERROR:.1%})")
+        dist = sketch.to_frame(group=5)
+        st.altair_chart(alt.Chart(dist).mark_bar().encode(
+            x=alt.X("wage_lo:Q", scale=alt.Scale(type="log"), title="annual wage"), x2="wage_hi:Q", y="count:Q"),
+            use_container_width=True)
+
     st.subheader("Top Employers")
-    top_emp = f.groupby("employer").size().reset_index(name="count").sort_values("count", ascending=False).head(15)
+    top_emp = cube.top_employers(m, 15)
     st.dataframe(top_emp, use_container_width=True)
 
     st.subheader("Records")
-    st.dataframe(f.head(200), use_container_width=True)
+    pager = load_pager()
+    bm = load_index().bitmap(decision_year=year_sel, state=state_sel or None, employer=employer_sel or None)
+    r1, r2, r3 = st.columns(3)
+    sort_by = r1.selectbox("Sort by", list(pager.perm))
+    ascending = r2.radio("Order", ["Ascending", "Descending"], horizontal=True) == "Ascending"
+
+    # cursor stack per view; any filter or sort change starts again from page 1
+    view = (tuple(year_sel), tuple(state_sel), tuple(employer_sel), sort_by, ascending)
+    if st.session_state.get("records_view") != view:
+        st.session_state["records_view"] = view
+        st.session_state["records_cursors"] = [None]
+    cursors = st.session_state["records_cursors"]
+    page, next_cursor = pager.page(bm, sort_by, ascending, cursors[-1])
+    pages = max(1, -(-pager.count(bm) // PAGE_SIZE))
+    r3.caption(f"Page {len(cursors)} of {pages:,}")
+    st.dataframe(page, use_container_width=True)
+    b1, b2 = st.columns(2)
+    b1.button("◀ Previous", disabled=len(cursors) == 1, on_click=cursors.pop)
+    b2.button("Next ▶", disabled=next_cursor is None, on_click=cursors.append, args=(next_cursor,))
@@ -0,0 +1,149 @@
+"""Table-only HTML extraction shared by the scrapers.
+
+Instead of building a BeautifulSoup tree for the whole page, an
+html.parser.HTMLParser collects only the cells of the first <table> and
+stops reading once that table closes. Comments and <script>/<style>
+content are skipped by the tokenizer, so markup inside them is never
+mistaken for the table. Cells come back as columnar lists, and numeric
+columns are coerced in one vectorized pass.
+"""
+from html.parser import HTMLParser
+
+import pandas as pd
+
+_NUMBER_JUNK = r"[\$,\s]"
+_FEED_CHARS = 64 * 1024  # the page is fed in slices so parsing stops soon after the table ends
+
+SPONSOR_COLUMNS = ["Rank", "Employer", "Number of LCA", "Average Salary"]
+
+
+class _TableParser(HTMLParser):
+    """Collects headers and rows of the first top-level <table>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.headers, self.rows = [], []
+        self.row = self.cell = None
+        self.is_header = False
+        self.depth = 0
+        self.found = self.done = False
+
+    def _close_cell(self):
+        if self.cell is not None:
+            text = "".join(self.cell).strip()
+            if self.is_header:
+                self.headers.append(text)
+            elif self.row is not None:
+                self.row.append(text)
+            self.cell = None
+
+    def _close_row(self):
+        if self.row:
+            self.rows.append(self.row)
+        self.row = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            self.depth += 1
+            self.found = True
+        elif self.depth == 1 and tag in ("td", "th"):
+            self._close_cell()
+            self.cell, self.is_header = [], tag == "th"
+        elif self.depth == 1 and tag == "tr":
+            self._close_cell()
+            self._close_row()
+            self.row = []
+
+    def handle_endtag(self, tag):
+        if self.done or not self.depth:
+            return
+        if tag == "table":
+            self.depth -= 1
+            if not self.depth:
+                self._close_cell()
+                self._close_row()
+                self.done = True
+        elif self.depth == 1 and tag in ("td", "th"):
+            self._close_cell()
+        elif self.depth == 1 and tag == "tr":
+            self._close_cell()
+            self._close_row()
+
+    def handle_data(self, data):
+        if self.cell is not None and not self.done:
+            self.cell.append(data)
+
+
+def extract_table(html):
+    """(headers, rows) of the first <table> in html, or None when the page has no table.
+
+    Nested tables are flattened into the enclosing cell's text, and an
+    unclosed <td>/<th>/<tr> is closed by the next cell or row, as browsers do.
+    """
+    parser = _TableParser()
+    for i in range(0, len(html), _FEED_CHARS):
+        parser.feed(html[i:i + _FEED_CHARS])
+        if parser.done:
+            break
+    else:
+        parser.close()
+        parser._close_cell()
+        parser._close_row()
+    if not parser.found:
+        return None
+    return parser.headers, parser.rows
+
+
+def table_columns(html, width=None):
+    """Columnar {header: list} for the first table; rows shorter than `width` (default: header count) are dropped.
+
+    Missing or unnamed headers become their position as a string.
+    """
+    table = extract_table(html)
+    if table is None:
+        return None
+    headers, rows = table
+    width = width or len(headers) or max((len(r) for r in rows), default=0)
+    names = [h or str(i) for i, h in enumerate(headers[:width])] + [str(i) for i in range(len(headers), width)]
+    rows = [r[:width] for r in rows if len(r) >= width]
+    columns = list(zip(*rows)) if rows else [()] * width
+    return {name: list(col) for name, col in zip(names, columns)}
+
+
+def table_frame(html, width=None):
+    """The first table as a DataFrame of strings, or None when the page has no table."""
+    columns = table_columns(html, width)
+    return None if columns is None else pd.DataFrame(columns)
+
+
+def to_number(s, dtype=float):
+    """'$1,234.50' -> 1234.5 for a whole column at once; blanks and junk become NaN (or <NA> for ints)."""
+    values = pd.to_numeric(s.astype(str).str.replace(_NUMBER_JUNK, "", regex=True), errors="coerce")
+    if dtype is int:
+        return values.where(values % 1 == 0).astype("Int64")
+    return values.astype(dtype)
+
+
+def snake_headers(df):
+    """Headers normalised the way the h1bdata.info scrapers store them ('Average Salary' -> 'average_salary')."""
+    return df.rename(columns=lambda c: c.strip().lower().replace(" ", "_"))
+
+
+def sponsor_rows(html):
+    """MyVisaJobs ranking table as Rank/Employer/Number of LCA/Average Salary, or None without a table.
+
+    Rows with fewer than four cells or a missing/zero value in any column are
+    dropped, as the row-by-row scrapers did.
+    """
+    df = table_frame(html, width=4)
+    if df is None:
+        return None
+    df.columns = SPONSOR_COLUMNS
+    df["Rank"] = to_number(df["Rank"], int)
+    df["Number of LCA"] = to_number(df["Number of LCA"], int)
+    df["Average Salary"] = to_number(df["Average Salary"])
+    keep = (df["Rank"].gt(0) & df["Employer"].ne("") & df["Number of LCA"].gt(0) & df["Average Salary"].gt(0)).fillna(False)
+    df = df[keep.to_numpy(dtype=bool)].reset_index(drop=True)
+    return df.astype({"Rank": "int64", "Number of LCA": "int64"})
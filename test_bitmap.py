@@ -0,0 +1,20 @@
+
+import numpy as np
+import pandas as pd
+from etl.bitmap import BitmapIndex
+
+def test_select_matches_isin():
+    rng = np.random.default_rng(0)
+    n = 10001
+    df = pd.DataFrame({
+        "decision_year": rng.choice([2022,2023,2024], n).astype("int16"),
+        "state": pd.Categorical(rng.choice(["NY","TX","CA","WY"], n, p=[.4,.3,.29,.01])),
+        "employer": pd.Categorical(rng.choice([f"Emp {i}" for i in range(500)], n)),
+        "case_status": pd.Categorical(rng.choice(["CERTIFIED","DENIED"], n)),
+    })
+    idx = BitmapIndex(df)
+    rows = idx.select(decision_year=[2023,2024], state=["NY","WY"], employer=["Emp 1","Emp 7","Emp 499","Nobody"])
+    m = df["decision_year"].isin([2023,2024]) & df["state"].isin(["NY","WY"]) & df["employer"].isin(["Emp 1","Emp 7","Emp 499"])
+    assert (rows == np.flatnonzero(m)).all()
+    assert len(idx.select()) == n
+    assert len(idx.select(decision_year=[])) == 0
@@ -0,0 +1,47 @@
+import pandas as pd
+import bloomberg
+import uscics_csv
+
+def _write(path, n=400):
+    pd.DataFrame({
+        "lottery_year": ["2024"] * n,
+        "status_type": (["SELECTED", "ELIGIBLE", "CREATED", None] * n)[:n],
+        "employer_name": (["Acme", "Globex", "Initech"] * n)[:n],
+        "state": (["NY", "TX"] * n)[:n],
+        "city": (["New York", "Austin"] * n)[:n],
+        "zip": (["10001", "73301"] * n)[:n],
+        "rec_fein": [str(i) for i in range(n)],
+        "notes": ["free text " * 5] * n,
+    }).to_csv(path, index=False)
+
+def test_projected_categorical_read(tmp_path):
+    path = tmp_path / "TRK_13139_FY2024_single_reg.csv"
+    _write(path)
+    df = bloomberg.load_bloomberg(str(path), chunksize=150)
+    assert list(df.columns) == list(bloomberg.BLOOMBERG_DTYPES)
+    assert all(isinstance(df[c].dtype, pd.CategoricalDtype) for c in df.columns)
+    assert df["employer_name"].value_counts()["Acme"] == 134
+    full = pd.read_csv(path, dtype=str)
+    assert df.memory_usage(deep=True).sum() * 10 < full.memory_usage(deep=True).sum()
+
+def test_cache_and_schema(tmp_path, monkeypatch):
+    path = tmp_path / "TRK_13139_FY2024_single_reg.csv"
+    _write(path, 10)
+    first = bloomberg.load_bloomberg(str(path))
+    monkeypatch.setattr(bloomberg, "read_source", lambda *a, **k: (_ for _ in ()).throw(AssertionError("re-read")))
+    monkeypatch.setattr(pd, "read_csv", lambda *a, **k: (_ for _ in ()).throw(AssertionError("csv scan")))
+    pd.testing.assert_frame_equal(bloomberg.load_bloomberg(str(path)), first)
+    assert bloomberg.bloomberg_schema(str(path))[-2:] == ["rec_fein", "notes"]
+    monkeypatch.undo()
+    with open(path, "a") as fh:
+        fh.write("2024,SELECTED,Umbrella,WA,Seattle,98101,99,x\n")
+    assert len(bloomberg.load_bloomberg(str(path))) == 11
+
+def test_process_bloomberg_data(tmp_path):
+    path = tmp_path / "TRK_13139_FY2024_single_reg.csv"
+    _write(path, 4)
+    out = uscics_csv.process_bloomberg_data(str(path))
+    assert out["approval_status"].tolist() == ["Approved", "Approved", "Unknown", "Unknown"]
+    assert out["fiscal_year"].tolist() == ["2024"] * 4
+    assert out["zip_code"].tolist() == ["10001", "73301", "10001", "73301"]
+    assert out["initial_approvals"].isna().all()
@@ -1,6 +1,7 @@
 
 import pandas as pd
-from etl.clean import normalize_wage, basic_clean
+import os
+from etl.clean import normalize_wage, basic_clean, load_cleaned, iter_cleaned, reduce_cleaned, compact_dtypes, memory_report
 
 def test_norm():
     df = pd.DataFrame({
@@ -25,3 +26,101 @@ def test_clean():
     assert out.loc[0,"job_title"]=="Data Scientist"
     assert out.loc[0,"city"]=="New York"
     assert out.loc[0,"state"]=="NY"
+
+def test_norm_oflc_units():
+    df = pd.DataFrame({
+        "wage_offered":["$4,000","3000","85000 - 95000",100],
+        "wage_unit":[" Bi-Weekly","month","Year","fortnight"],
+    })
+    out = normalize_wage(df)
+    assert list(out["wage_unit"]) == ["BI-WEEKLY","MONTH","YEAR","FORTNIGHT"]
+    assert abs(out.loc[0,'wage_annual']-4000*26)<1e-6
+    assert abs(out.loc[1,'wage_annual']-3000*12)<1e-6
+    assert abs(out.loc[2,'wage_annual']-85000)<1e-6
+    assert abs(out.loc[3,'wage_annual']-100)<1e-6
+
+def test_streaming(tmp_path):
+    path = tmp_path / "lca.csv"
+    pd.DataFrame({
+        "employer":[" acme ","globex","acme "]*3,"job_title":["dev"]*9,"city":["austin"]*9,
+        "state":["tx"]*9,"case_status":["CERTIFIED","DENIED","CERTIFIED"]*3,
+        "wage_offered":[50,100000,2000]*3,"wage_unit":["HOUR","YEAR","WEEK"]*3,
+        "soc_code":["15-1252"]*9,"decision_year":[2024]*9
+    }).to_csv(path, index=False)
+    chunks = list(iter_cleaned(str(path), chunksize=4))
+    assert [len(c) for c in chunks] == [4,4,1]
+    full = load_cleaned(str(path), chunksize=4)
+    assert full.equals(load_cleaned(str(path)))
+    certified = reduce_cleaned(str(path), lambda n, c: n + (c["case_status"]=="CERTIFIED").sum(), 0, chunksize=4)
+    assert certified == 6
+    assert list(full["employer"].unique()) == ["Acme","Globex"]
+
+def test_chunks_compacted_before_concat(tmp_path):
+    path = tmp_path / "lca.csv"
+    pd.DataFrame({
+        "employer":["zeta","acme","mid","beta","acme"],"job_title":["dev"]*5,"city":["austin"]*5,
+        "state":["tx"]*5,"case_status":["CERTIFIED"]*5,"wage_offered":[1]*5,"wage_unit":["YEAR"]*5,
+        "soc_code":["15-1252"]*5,"decision_year":[2024,2024,None,2023,2023]
+    }).to_csv(path, index=False)
+    chunked = load_cleaned(str(path), chunksize=2)
+    whole = load_cleaned(str(path))
+    pd.testing.assert_frame_equal(chunked, whole)
+    assert chunked["employer"].dtype == "category" and str(chunked["decision_year"].dtype) == "Int16"
+
+def test_cache(tmp_path):
+    path = tmp_path / "lca.csv"
+    pd.DataFrame({
+        "employer":["acme"],"job_title":["dev"],"city":["austin"],"state":["tx"],"case_status":["CERTIFIED"],
+        "wage_offered":[50],"wage_unit":["HOUR"],"soc_code":["15-1252"],"decision_year":[2024]
+    }).to_csv(path, index=False)
+    cache = str(tmp_path / "cache")
+    first = load_cleaned(str(path), cache_dir=cache)
+    assert any(f.endswith(".parquet") for f in os.listdir(cache))
+    assert load_cleaned(str(path), cache_dir=cache).equals(first)
+    # same bytes, new mtime: still served from cache
+    os.utime(path, ns=(0, 0))
+    assert load_cleaned(str(path), cache_dir=cache).equals(first)
+    # changed source: rebuilt
+    path.write_text(path.read_text().replace("acme", "globex"))
+    assert load_cleaned(str(path), cache_dir=cache).loc[0, "employer"] == "Globex"
+
+def test_code_version_covers_source_cache(tmp_path, monkeypatch):
+    import source_cache
+    from etl.clean import clean_code_version
+    before = clean_code_version()
+    edited = tmp_path / "source_cache.py"
+    edited.write_text(open(source_cache.__file__).read() + "\n# edited\n")
+    monkeypatch.setattr(source_cache, "__file__", str(edited))
+    clean_code_version.cache_clear()
+    try:
+        assert clean_code_version() != before
+    finally:
+        clean_code_version.cache_clear()
+
+def test_compact_dtypes():
+    df = normalize_wage(basic_clean(pd.DataFrame({
+        "employer":["acme","globex"]*50,"job_title":["dev"]*100,"city":["austin"]*100,"state":["tx"]*100,
+        "case_status":["CERTIFIED"]*100,"wage_offered":[50,60]*50,"wage_unit":["HOUR"]*100,
+        "soc_code":["15-1252"]*100,"decision_year":[2024,2023]*50
+    })))
+    out = compact_dtypes(df)
+    assert out["employer"].dtype == "category" and out["soc_code"].dtype == "category"
+    assert out["wage_annual"].dtype == "float32" and out["decision_year"].dtype == "int16"
+    rep = memory_report(df, out)
+    assert rep.loc["TOTAL","bytes_after"] < rep.loc["TOTAL","bytes_before"]
+
+def test_clean_matches_rowwise():
+    raw = pd.DataFrame({
+        "employer":[" acme inc","acme inc ",None,"o'neil llc"],"job_title":["dev"]*4,
+        "city":[" new york","new york",1.0,"st. louis"],"state":["ny","ny ","NY","mo"],
+        "case_status":[" certified ","certified","DENIED","CERTIFIED"],
+    })
+    expected = raw.copy()
+    for c in ["employer","job_title","city","state","case_status"]:
+        expected[c] = expected[c].astype(str).str.strip()
+    for c in ["employer","job_title","city"]:
+        expected[c] = expected[c].str.title()
+    expected["state"] = expected["state"].str.upper()
+    cache = {}
+    assert basic_clean(raw, cache).equals(expected)
+    assert cache["employer"]["acme inc "] == "Acme Inc"
@@ -0,0 +1,44 @@
+
+import numpy as np
+import pandas as pd
+from etl.cube import build_cube
+from etl.sketch import REL_ERROR, WageSketch
+
+def sample(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "decision_year": rng.choice([2022,2023,2024], n).astype("int16"),
+        "state": pd.Categorical(rng.choice(["NY","TX","CA"], n)),
+        "employer": pd.Categorical(rng.choice(["Acme","Globex","Initech","Umbrella"], n)),
+        "case_status": pd.Categorical(rng.choice(["CERTIFIED","DENIED","WITHDRAWN"], n, p=[.8,.1,.1])),
+        "wage_annual": rng.lognormal(11.5, 0.4, n).astype("float32"),
+    })
+
+def test_cube_matches_rows():
+    df = sample()
+    cube = build_cube(df)
+    m = cube.mask(years=[2023,2024], states=["NY","CA"])
+    f = df[df["decision_year"].isin([2023,2024]) & df["state"].isin(["NY","CA"])]
+    assert cube.total(m) == len(f)
+    assert abs(cube.approval_rate(m) - (f["case_status"]=="CERTIFIED").mean()) < 1e-12
+    yearly = f.groupby("decision_year").size()
+    assert cube.yearly(m).set_index("decision_year")["count"].to_dict() == yearly.to_dict()
+    top = f.groupby("employer", observed=True).size().sort_values(ascending=False)
+    assert cube.top_employers(m, 2)["count"].tolist() == top.head(2).tolist()
+    assert abs(cube.median_wage(m) / f["wage_annual"].median() - 1) < REL_ERROR
+
+def test_cube_empty_selection():
+    cube = build_cube(sample(100))
+    m = cube.mask(years=[])
+    assert cube.total(m) == 0 and np.isnan(cube.median_wage(m))
+
+def test_sketch_merge_and_error_bound():
+    df = sample(20000, seed=1)
+    a, b = df.iloc[:7000], df.iloc[7000:]
+    merged = WageSketch.from_values(a["wage_annual"]) + WageSketch.from_values(b["wage_annual"])
+    assert (merged.counts == WageSketch.from_values(df["wage_annual"]).counts).all()
+    for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+        assert abs(merged.quantile(q) / df["wage_annual"].quantile(q) - 1) < REL_ERROR
+    cube = build_cube(df)
+    assert (cube.wage_sketch(cube.mask()).counts == merged.counts).all()
+    assert merged.to_frame(group=5)["count"].sum() == len(df)
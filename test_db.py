@@ -0,0 +1,68 @@
+
+import pytest
+import db
+
+@pytest.fixture
+def table(dbname):
+    with db.connection(dbname=dbname) as conn, conn.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS h1b_top_test")
+        cursor.execute("CREATE TABLE h1b_top_test (company_name TEXT UNIQUE, filings INT, avg_salary NUMERIC)")
+    yield "h1b_top_test"
+    with db.connection(dbname=dbname) as conn, conn.cursor() as cursor:
+        cursor.execute("DROP TABLE h1b_top_test")
+
+def test_pool_reuses_connections_and_prepared_upsert(table, dbname):
+    cols = ["company_name", "filings", "avg_salary"]
+    with db.connection(dbname=dbname) as conn, conn.cursor() as cursor:
+        first = conn
+        name = db.prepare_upsert(cursor, table, cols, "company_name")
+        db.execute_prepared(cursor, name, [("Acme", 10, 100000.0), ("Globex", 5, 90000.0)])
+    with db.connection(dbname=dbname) as conn, conn.cursor() as cursor:
+        assert conn is first and name in conn.prepared
+        db.execute_prepared(cursor, db.prepare_upsert(cursor, table, cols, "company_name"), [("Acme", 12, 110000.0)])
+        cursor.execute(f"SELECT company_name, filings FROM {table} ORDER BY 1")
+        assert cursor.fetchall() == [("Acme", 12), ("Globex", 5)]
+
+def test_rollback_and_health_check(table, dbname):
+    with pytest.raises(RuntimeError):
+        with db.connection(dbname=dbname) as conn, conn.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {table} VALUES ('Initech', 1, 1)")
+            raise RuntimeError("boom")
+    with db.connection(dbname=dbname) as conn, conn.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {table}")
+        assert cursor.fetchone() == (0,)
+    conn.close()  # simulate a connection dropped while idle in the pool
+    conn.last_used -= db.HEALTHCHECK_IDLE + 1
+    with db.connection(dbname=dbname) as conn:
+        assert not conn.closed and db.ping(conn)
+
+def test_upsert_values_counts_inserted_and_updated(table, dbname):
+    cols = ["company_name", "filings", "avg_salary"]
+    with db.connection(dbname=dbname) as conn, conn.cursor() as cursor:
+        rows = [(f"Emp {i}", i, 1000.0 * i) for i in range(7)]
+        assert db.upsert_values(cursor, table, cols, "company_name", rows, page_size=3) == (7, 0)
+        again = [("Emp 1", 99, 1.0), ("Emp 9", 9, 9.0), ("Emp 9", 10, 10.0)]
+        assert db.upsert_values(cursor, table, cols, "company_name", again, page_size=3) == (1, 1)
+        cursor.execute(f"SELECT filings FROM {table} WHERE company_name IN ('Emp 1', 'Emp 9') ORDER BY 1")
+        assert cursor.fetchall() == [(10,), (99,)]
+
+def test_upsert_changed_skips_unchanged_rows(table, dbname):
+    import pandas as pd
+    import changes
+    cols = ["company_name", "filings", "avg_salary"]
+    df = pd.DataFrame({"company_name": ["Acme", "Globex", "Initech"], "filings": [10, 5, 3], "avg_salary": [1e5, 9e4, 8e4]})
+    with db.connection(dbname=dbname) as conn, conn.cursor() as cursor:
+        changes.ensure_fingerprint_table(cursor)
+        cursor.execute(f"DELETE FROM {changes.FINGERPRINT_TABLE} WHERE section = %s", (table,))
+        assert changes.upsert_changed(cursor, table, df, cols, "company_name") == (3, 0, 0)
+        assert changes.upsert_changed(cursor, table, df, cols, "company_name") == (0, 0, 3)
+        df.loc[1, "avg_salary"] = 95000.0
+        assert changes.upsert_changed(cursor, table, df, cols, "company_name") == (0, 1, 2)
+        # another writer rewrites the table and clears the section's fingerprints: every row is written again
+        cursor.execute(f"DELETE FROM {table} WHERE company_name = 'Acme'")
+        cursor.execute(f"UPDATE {table} SET filings = 1 WHERE company_name = 'Initech'")
+        changes.clear_fingerprints(cursor, table)
+        assert changes.upsert_changed(cursor, table, df, cols, "company_name") == (1, 2, 0)
+        cursor.execute(f"SELECT company_name, filings FROM {table} ORDER BY 1")
+        assert cursor.fetchall() == [("Acme", 10), ("Globex", 5), ("Initech", 3)]
+        cursor.execute(f"DELETE FROM {changes.FINGERPRINT_TABLE} WHERE section = %s", (table,))
@@ -0,0 +1,30 @@
+import time
+import fetcher
+from bench_fetch import local_urls, sample_page, serve_pages
+from h1bdata import H1B_URLS, parse_h1b_page
+
+def test_sections_fetched_concurrently():
+    pages = {"/" + url.rsplit("/", 1)[1]: sample_page(20) for url in H1B_URLS.values()}
+    seen = []
+    with serve_pages(pages, latency=0.3) as base:
+        start = time.perf_counter()
+        results = fetcher.run_all(local_urls(base), parse_h1b_page, on_result=lambda s, df: seen.append(s))
+        elapsed = time.perf_counter() - start
+    assert elapsed < 1.2  # six sequential round trips would take 1.8s
+    assert sorted(seen) == sorted(H1B_URLS)
+    df = results["h1b_top_companies"]
+    assert df["filings"].iloc[0] == 19 * 37 and df["avg_salary"].iloc[0] == 90_311.0
+
+def test_retries_and_failures():
+    def parse(name, response):
+        return response.status_code, response.text
+
+    pages = {"/ok": b"ok", "/flaky": [(503, b""), (503, b""), (200, b"third time")], "/down": [(503, b"")]}
+    with serve_pages(pages) as base:
+        results = fetcher.run_all({n: base + "/" + n for n in ("ok", "flaky", "down", "missing")},
+                                  parse, retries=2, backoff=0.01)
+    assert results == {"ok": (200, "ok"), "flaky": (200, "third time"), "down": (503, ""), "missing": (404, "")}
+
+    with serve_pages({"/slow": b"x"}, latency=0.5) as base:
+        results = fetcher.run_all({"slow": base + "/slow"}, parse, timeout=0.1, retries=1, backoff=0.01)
+    assert results == {"slow": None}
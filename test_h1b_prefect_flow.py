@@ -0,0 +1,33 @@
+import sys
+import pytest
+
+pytest.importorskip("prefect")
+try:
+    import h1b_prefect_flow as hpf
+except Exception as e:  # Prefect 2 cannot build flows with some pydantic releases
+    pytest.skip(f"Prefect cannot load the flow here: {type(e).__name__}", allow_module_level=True)
+
+from prefect.task_runners import ConcurrentTaskRunner, SequentialTaskRunner
+
+def test_make_task_runner(monkeypatch):
+    assert isinstance(hpf.make_task_runner("sequential"), SequentialTaskRunner)
+    assert isinstance(hpf.make_task_runner("threads"), ConcurrentTaskRunner)
+    monkeypatch.setitem(sys.modules, "prefect_dask", None)  # not installed: falls back to threads
+    assert isinstance(hpf.make_task_runner("processes"), ConcurrentTaskRunner)
+
+def test_ensure_concurrency_limits(monkeypatch):
+    created = []
+
+    class Client:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            pass
+
+        async def create_concurrency_limit(self, tag, concurrency_limit):
+            created.append((tag, concurrency_limit))
+
+    monkeypatch.setattr(hpf, "get_client", Client)
+    hpf.ensure_concurrency_limits({hpf.FETCH_TAG: 2, hpf.SAVE_TAG: 3})
+    assert created == [("h1bdata-http", 2), ("h1b-postgres", 3)]
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+import db
+import h1b_queries
+import uscics_csv
+
+@pytest.fixture
+def loaded(pg, dbname):
+    pg.cursor().execute("DROP TABLE IF EXISTS h1b_visa_data")
+    df = pd.DataFrame({
+        "fiscal_year": ["2022", "2023", "2023", "2023", "2024"],
+        "employer_name": ["Acme", "Acme", "Acme", "Globex", "Acme"],
+        "state": ["NY", "NY", "CA", "TX", "NY"],
+        "approval_status": ["Approved", "Approved", "Denied", "Approved", "Approved"],
+        "initial_approvals": [10, 6, 0, 20, pd.NA], "initial_denials": [1, 0, 2, 0, pd.NA],
+        "continuing_approvals": [5, 2, 0, 0, pd.NA], "continuing_denials": [0, 0, 0, 5, pd.NA],
+    })
+    uscics_csv.save_to_postgres(df, dbname=dbname)
+    with db.connection(dbname=dbname) as conn, conn.cursor() as cursor:
+        uscics_csv.create_indexes(cursor)
+    yield dbname
+    pg.cursor().execute("DROP TABLE IF EXISTS h1b_visa_data")
+
+def test_employer_history(loaded):
+    hist = h1b_queries.employer_history("Acme", dbname=loaded)
+    assert hist["fiscal_year"].tolist() == [2022, 2023, 2024]
+    assert hist["approvals"].tolist() == [15, 8, 0]
+    assert hist["approval_rate"].iloc[1] == pytest.approx(0.8)
+    assert h1b_queries.approval_rate(2023, dbname=loaded) == pytest.approx(28 / 35)
+    assert h1b_queries.approval_rate(2023, state="TX", dbname=loaded) == pytest.approx(0.8)
+
+def test_top_employers_and_status(loaded):
+    top = h1b_queries.top_employers([2023], dbname=loaded)
+    assert top["employer_name"].tolist() == ["Globex", "Acme"]
+    counts = h1b_queries.status_counts(years=2023, dbname=loaded)
+    assert dict(zip(counts["approval_status"], counts["records"])) == {"Approved": 2, "Denied": 1}
+    assert h1b_queries.status_counts(years=np.int64(2023), dbname=loaded).equals(counts)  # e.g. a year taken from a frame
+
+def test_year_filter_prunes_partitions(loaded):
+    plan = h1b_queries.explain("SELECT count(*) FROM h1b_visa_data WHERE fiscal_year = ANY(%s)", ([2023],), dbname=loaded)
+    assert "h1b_visa_data_fy2023" in plan and "h1b_visa_data_fy2022" not in plan
@@ -0,0 +1,90 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import fetcher
+import http_cache
+
+@pytest.fixture
+def site():
+    """Tiny origin: /etag answers If-None-Match with 304, /plain has no validators."""
+    state = {"body": b"<table><tr><td>1</td></tr></table>", "hits": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            etag = '"%s"' % hashlib.md5(state["body"]).hexdigest()
+            state["hits"].append((self.path, self.headers.get("If-None-Match")))
+            if self.path == "/etag" and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            if self.path == "/etag":
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(state["body"])))
+            self.end_headers()
+            self.wfile.write(state["body"])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["base"] = f"http://127.0.0.1:{server.server_port}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+def test_conditional_get_and_commit(site, tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path))
+    url = site["base"] + "/etag"
+    first = cache.get(url)
+    assert first.changed and not first.from_cache and site["hits"][-1][1] is None
+
+    again = cache.get(url)  # not committed yet: still needs processing
+    assert again.changed and again.from_cache and again.status_code == 200
+    assert again.text == first.text and site["hits"][-1][1] is not None
+
+    cache.commit(url)
+    assert not cache.get(url).changed
+
+    site["body"] = b"<table><tr><td>2</td></tr></table>"
+    changed = cache.get(url)
+    assert changed.changed and "2" in changed.text
+
+def test_body_hash_without_validators(site, tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path))
+    url = site["base"] + "/plain"
+    assert cache.get(url).changed
+    cache.commit(url)
+    same = cache.get(url)
+    assert not same.changed and not same.from_cache and site["hits"][-1][1] is None
+
+def test_fetcher_skips_unchanged_pages(site, tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path))
+    urls = {"a": site["base"] + "/etag", "b": site["base"] + "/plain"}
+    parsed = []
+    parse = lambda name, response: parsed.append(name) or response.text
+    fetcher.run_all(urls, parse, cache=cache)
+    cache.commit(*urls.values())
+    results = fetcher.run_all(urls, parse, cache=cache)
+    assert sorted(parsed) == ["a", "b"]
+    assert results == {"a": fetcher.UNCHANGED, "b": fetcher.UNCHANGED}
+
+def test_commit_is_per_consumer_and_records_served_body(site, tmp_path):
+    url = site["base"] + "/plain"
+    scraper = http_cache.HttpCache(str(tmp_path), consumer="h1bdata")
+    other = http_cache.HttpCache(str(tmp_path), consumer="track")
+    served = scraper.get(url)
+    assert served.changed and other.get(url).changed
+
+    site["body"] = b"<table><tr><td>2</td></tr></table>"
+    assert other.get(url).changed  # another process stores a newer body before the scraper commits
+    scraper.commit(url)
+    assert scraper.entry(url)["committed"] == {"h1bdata": served.sha256}
+    assert scraper.get(url).changed  # the newer body was never processed here
+    assert other.get(url).changed  # and the scraper's commit is not the other consumer's
+
+    other.commit(url, sha256=served.sha256)  # a body processed elsewhere is named by its digest
+    assert other.entry(url)["committed"] == {"h1bdata": served.sha256, "track": served.sha256}
@@ -0,0 +1,27 @@
+import pytest
+import requests
+import http_client
+from bench_fetch import serve_pages
+
+def test_retries_and_timeouts():
+    session = http_client.make_session(retries=2, backoff=0.01)
+    pages = {"/flaky": [(503, b""), (503, b""), (200, b"third time")], "/down": [(503, b"")]}
+    with serve_pages(pages) as base:
+        flaky = session.get(base + "/flaky")
+        down = session.get(base + "/down")
+    assert (flaky.status_code, flaky.text) == (200, "third time")
+    assert down.status_code == 503  # retries exhausted: the last response comes back, as before
+
+    session = http_client.make_session(retries=0)
+    with serve_pages({"/slow": b"x"}, latency=0.5) as base:
+        # exhausted read-timeout retries surface as a ConnectionError; scrapers catch RequestException
+        with pytest.raises(requests.RequestException, match="Read timed out"):
+            session.get(base + "/slow", timeout=(1, 0.1))
+
+def test_shared_session_and_backoff():
+    assert http_client.session() is http_client.session()
+    adapter = http_client.session().get_adapter("https://www.h1bdata.info/")
+    assert adapter.max_retries.total == http_client.RETRIES and adapter._pool_maxsize == http_client.POOL_SIZE
+    delays = [http_client.backoff_delay(3, base=0.5) for _ in range(100)]
+    assert all(2.0 <= d <= 4.0 for d in delays) and len(set(delays)) > 1
+    assert http_client.backoff_delay(20) <= http_client.BACKOFF_MAX
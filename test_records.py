@@ -0,0 +1,33 @@
+
+import numpy as np
+import pandas as pd
+from etl.bitmap import BitmapIndex
+from etl.records import RecordPager
+
+def walk(pager, bm, col, asc, size):
+    out, cur = [], None
+    while True:
+        page, cur = pager.page(bm, col, asc, cur, size)
+        out.append(page)
+        if cur is None:
+            return pd.concat(out)
+
+def test_pages_follow_full_sort():
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({
+        "decision_year": rng.choice([2023,2024], n).astype("int16"),
+        "employer": pd.Categorical(rng.choice([f"Emp {i:03d}" for i in range(400)], n)),
+        "wage_annual": rng.uniform(5e4, 2e5, n).astype("float32"),
+    })
+    df.loc[::97, "wage_annual"] = np.nan
+    idx, pager = BitmapIndex(df, ["decision_year","employer"]), RecordPager(df)
+    for filters in ({"decision_year":[2024]}, {"employer":["Emp 001","Emp 002"]}):
+        bm = idx.bitmap(**filters)
+        f = df.iloc[idx.select(**filters)]
+        for col in ("wage_annual","employer"):
+            for asc in (True, False):
+                got = walk(pager, bm, col, asc, 37)
+                exp = f.sort_values(col, ascending=asc, kind="stable", na_position="last" if asc else "first")
+                assert got[col].astype(str).tolist() == exp[col].astype(str).tolist()
+                assert sorted(got.index) == sorted(f.index)
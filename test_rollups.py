@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+import db
+import rollups
+
+@pytest.fixture
+def cursor(dbname):
+    tables = [rollups.ROLLUP_TABLE] + list(rollups.RANKINGS)
+    with db.connection(dbname=dbname) as conn, conn.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS " + ", ".join(tables))
+        rollups.create_tables(cur)
+        yield cur
+        conn.rollback()
+        cur.execute("DROP TABLE IF EXISTS " + ", ".join(tables))
+
+def lca(rows):
+    return pd.DataFrame(rows, columns=["employer", "job_title", "city", "state", "wage_annual", "decision_year"])
+
+def fetch(cursor, table, key):
+    cursor.execute(f"SELECT {key}, filings, avg_salary FROM {table} ORDER BY {key}")
+    return [(k, f, float(s)) for k, f, s in cursor.fetchall()]
+
+def test_rankings_from_partials(cursor):
+    a = lca([["Acme", "Engineer", "Austin", "TX", 100_000, 2024]] * 3
+            + [["Globex", "Analyst", "Austin", "TX", 200_000, 2024], ["Acme", "Engineer", "Austin", "TX", None, 2023]])
+    b = lca([["Globex", "Analyst", "New York", "NY", 300_000, 2024]])
+    rollups.ingest_partials(cursor, a, "lca_a.csv")
+    rollups.ingest_partials(cursor, b, "lca_b.csv")
+    rollups.refresh_rankings(cursor, top_n=1, min_filings=2)
+    assert fetch(cursor, "h1b_top_companies", "company_name") == [("Acme", 3, 100000.0)]
+    assert fetch(cursor, "h1b_highest_paid_companies", "company_name") == [("Globex", 2, 250000.0)]
+    assert fetch(cursor, "h1b_top_cities", "city_name") == [("Austin, TX", 4, 125000.0)]
+
+    cursor.execute("SELECT last_updated FROM h1b_top_companies")
+    stamp = cursor.fetchone()[0]
+    assert rollups.refresh_rankings(cursor, top_n=1, min_filings=2)["h1b_top_companies"] == 0  # unchanged rows untouched
+
+    # re-ingesting a file replaces only its own partials; names that drop out are removed
+    rollups.ingest_partials(cursor, lca([["Globex", "Analyst", "New York", "NY", 300_000, 2024]] * 4), "lca_b.csv")
+    changed = rollups.refresh_rankings(cursor, top_n=1, min_filings=2)
+    assert changed["h1b_top_companies"] == 1
+    assert fetch(cursor, "h1b_top_companies", "company_name") == [("Globex", 5, 280000.0)]
+    cursor.execute("SELECT last_updated FROM h1b_top_companies")
+    assert cursor.fetchone()[0] >= stamp
+
+def test_refresh_for_years_only_touches_the_shown_year(cursor):
+    rollups.ingest_partials(cursor, lca([["Acme", "Engineer", "Austin", "TX", 100_000, 2023],
+                                         ["Globex", "Analyst", "Austin", "TX", 90_000, 2024]]), "lca.csv")
+    assert rollups.refresh_for_years(cursor, [2023]) == {}  # rankings show 2024
+    assert rollups.refresh_for_years(cursor, [2023, 2024])["h1b_top_companies"] == 1
+    assert fetch(cursor, "h1b_top_companies", "company_name") == [("Globex", 1, 90000.0)]
@@ -0,0 +1,14 @@
+
+import pandas as pd
+from etl.search import EmployerSearch
+
+def test_prefix_then_substring_by_count():
+    emp = pd.Series(pd.Categorical(
+        ["Google Llc"]*5 + ["Goodwill"]*2 + ["Alphabet Google"]*9 + ["Amazon"]*3,
+        categories=["Amazon","Alphabet Google","Goodwill","Google Llc","Unused"]))
+    s = EmployerSearch(emp)
+    assert len(s) == 4
+    assert s.search("goo") == ["Google Llc","Goodwill","Alphabet Google"]
+    assert s.search("GOOGLE", limit=1) == ["Google Llc"]
+    assert s.search("", limit=2) == ["Alphabet Google","Google Llc"]
+    assert s.search("zzz") == []
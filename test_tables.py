@@ -0,0 +1,35 @@
+import pandas as pd
+import tables
+from bench_tables import fast_h1bdata, h1bdata_page, myvisajobs_page, soup_h1bdata, soup_myvisajobs
+
+def test_matches_full_soup_parse():
+    html = h1bdata_page(50)
+    pd.testing.assert_frame_equal(fast_h1bdata(html), soup_h1bdata(html), check_dtype=False)
+    html = myvisajobs_page(50)
+    pd.testing.assert_frame_equal(tables.sponsor_rows(html), soup_myvisajobs(html))
+
+def test_messy_markup():
+    html = ("<p>no</p><TABLE class=x><tr><th>Rank</th><th>Employer</th><th>LCA</th><th>Salary</th></tr>"
+            "<!-- <tr><td>9</td></tr> --><tr><td>1</td><td>Acme &amp; Co</td><td>1,200</td><td>$100,000</td></tr>"
+            "<tr><td>2<td>Zero<td>0<td>$5</tr><tr><td>x</td><td>Y</td><td>1</td><td>1</td></tr>"
+            "<tr><td>3</td><td>Short</td></tr><tr><td>4.5</td><td>Frac</td><td>1</td><td>1</td></tr>"
+            "<tr><td>5</td><td>Ok<table><tr><td>!</td></tr></table></td><td>7</td><td>$9.50</td></tr></table>"
+            "<table><tr><td>second</td></tr></table>")
+    headers, rows = tables.extract_table(html)
+    assert headers == ["Rank", "Employer", "LCA", "Salary"]
+    assert rows[1] == ["2", "Zero", "0", "$5"] and rows[3] == ["3", "Short"]
+    df = tables.sponsor_rows(html)
+    assert df.values.tolist() == [[1, "Acme & Co", 1200, 100000.0], [5, "Ok!", 7, 9.5]]
+    assert tables.extract_table("<html><body>none</body></html>") is None
+    assert tables.table_frame("<table></table>").empty
+
+    # tables inside scripts or comments, and '>' inside attribute values, are not the real table
+    real = "<table><tr><th>A</th></tr><tr><td title=\"a>b\">real</td></tr></table>"
+    assert tables.extract_table('<script>var t="<table><tr><td>x</td></tr></table>";</script>' + real) == (["A"], [["real"]])
+    assert tables.extract_table("<!-- old <table> -->" + real) == (["A"], [["real"]])
+    assert tables.extract_table("<script>'<table>'</script><!-- <table> -->") is None
+
+def test_to_number():
+    s = pd.Series(["$1,234.50", "", "n/a", " 7 ", None])
+    assert tables.to_number(s).tolist()[:1] == [1234.5] and tables.to_number(s).isna().sum() == 3
+    assert tables.to_number(s, int).tolist() == [pd.NA, pd.NA, pd.NA, 7, pd.NA]
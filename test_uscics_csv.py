@@ -0,0 +1,207 @@
+
+import os
+import pandas as pd
+import pytest
+import db
+import uscics_csv
+
+@pytest.fixture
+def conn(pg):
+    pg.cursor().execute("DROP TABLE IF EXISTS h1b_visa_data")
+    yield pg
+    pg.cursor().execute("DROP TABLE IF EXISTS h1b_visa_data")
+
+def test_copy_bulk_load(conn, monkeypatch, dbname):
+    monkeypatch.setattr(uscics_csv, "COPY_CHUNK_ROWS", 3)
+    df = pd.DataFrame({
+        "fiscal_year": ["2023","2024","2024","2024",None],
+        "employer_name": ["Acme, Inc.","O'Neil \"LLC\"","Globex","Initech","Umbrella"],
+        "state": ["NY","TX",None,"CA","WA"],
+        "city": ["New York","Austin","","Irvine","Seattle"],
+        "zip_code": ["10001","73301","","92602","98101"],
+        "approval_status": ["Approved","Denied","Approved","Unknown","Approved"],
+    })
+    assert uscics_csv.save_to_postgres(df, dbname=dbname) == 5
+    cur = conn.cursor()
+    cur.execute("SELECT fiscal_year, employer_name, state, city FROM h1b_visa_data ORDER BY id")
+    rows = cur.fetchall()
+    assert rows[1] == (2024, "O'Neil \"LLC\"", "TX", "Austin")
+    assert rows[2][2] is None and rows[4][0] is None
+    assert rows[2][3] == ""  # empty strings are not turned into NULL
+
+def test_parallel_ingest_to_staging(tmp_path, monkeypatch):
+    files = []
+    for year in (2022, 2023):
+        path = tmp_path / f"h1b_datahubexport-{year}.csv"
+        pd.DataFrame({
+            "Fiscal Year": [year] * 3, "Employer": ["Acme", "Globex", "Initech"], "State": ["NY", "TX", "CA"],
+            "City": ["New York", "Austin", "Irvine"], "ZIP": ["10001", "73301", "92602"],
+            "Initial Approval": ["1,200", "0", "3"], "Initial Denial": ["1", "2", "0"],
+        }).to_csv(path, index=False)
+        files.append(str(path))
+    bloomberg = tmp_path / "TRK_13139_FY2024_single_reg.csv"
+    pd.DataFrame({"lottery_year": ["2024"], "status_type": ["SELECTED"], "employer_name": ["Acme"],
+                  "state": ["NY"], "city": ["New York"], "zip": ["10001"]}).to_csv(bloomberg, index=False)
+    monkeypatch.setattr(uscics_csv, "uscis_files", files)
+    monkeypatch.setattr(uscics_csv, "bloomberg_file", str(bloomberg))
+    staging = tmp_path / "staging"
+    assert uscics_csv.main(workers=2, staging_dir=str(staging)) == 7
+    staged = pd.read_parquet(staging / "h1b_datahubexport-2023.parquet")
+    assert staged["approval_status"].tolist() == ["Approved", "Denied", "Approved"]
+
+def test_manifest_skips_unchanged_files(conn, tmp_path, monkeypatch, dbname):
+    conn.cursor().execute("DROP TABLE IF EXISTS h1b_ingest_manifest")
+    files = []
+    for year in (2022, 2023):
+        path = tmp_path / f"h1b_datahubexport-{year}.csv"
+        pd.DataFrame({"Fiscal Year": [year] * 2, "Employer": ["Acme", "Globex"], "State": ["NY", "TX"],
+                      "City": ["NYC", "Austin"], "ZIP": ["1", "2"],
+                      "Initial Approval": ["1", "0"], "Initial Denial": ["0", "1"]}).to_csv(path, index=False)
+        files.append(path)
+    monkeypatch.setattr(uscics_csv, "uscis_files", [str(f) for f in files])
+    monkeypatch.setattr(uscics_csv, "bloomberg_file", str(tmp_path / "missing.csv"))
+
+    analyzed = []
+    create_indexes = uscics_csv.create_indexes
+    monkeypatch.setattr(uscics_csv, "create_indexes", lambda cursor, years=None: analyzed.append(sorted(years)) or create_indexes(cursor, years))
+
+    assert uscics_csv.main(workers=1, dbname=dbname) == 4
+    assert uscics_csv.main(workers=1, dbname=dbname) == 0
+    os.utime(files[0])  # touched, same bytes
+    assert uscics_csv.main(workers=1, dbname=dbname) == 0
+    files[1].write_text(files[1].read_text() + "2023,Initech,CA,Irvine,3,5,0\n")
+    assert uscics_csv.main(workers=1, dbname=dbname) == 3
+    assert analyzed == [[2022, 2023], [2023]]  # runs that loaded nothing neither index nor analyze
+
+    cur = conn.cursor()
+    cur.execute("SELECT fiscal_year, count(*) FROM h1b_visa_data GROUP BY 1 ORDER BY 1")
+    assert cur.fetchall() == [(2022, 2), (2023, 3)]
+    cur.execute("SELECT source_file, fiscal_years, row_count FROM h1b_ingest_manifest ORDER BY 1")
+    assert cur.fetchall() == [("h1b_datahubexport-2022.csv", [2022], 2), ("h1b_datahubexport-2023.csv", [2023], 3)]
+    cur.execute("DROP TABLE h1b_ingest_manifest")
+
+def test_partitions_created_before_workers_start(conn, tmp_path, monkeypatch, dbname):
+    conn.cursor().execute("DROP TABLE IF EXISTS h1b_ingest_manifest")
+    files = []
+    for year in (2031, 2032):  # beyond FISCAL_YEARS, so each needs a new partition
+        path = tmp_path / f"h1b_datahubexport-{year}.csv"
+        pd.DataFrame({"Fiscal Year": [year], "Employer": ["Acme"], "State": ["NY"],
+                      "City": ["NYC"], "ZIP": ["1"], "Initial Approval": ["1"]}).to_csv(path, index=False)
+        files.append(str(path))
+    monkeypatch.setattr(uscics_csv, "uscis_files", files)
+    monkeypatch.setattr(uscics_csv, "bloomberg_file", str(tmp_path / "missing.csv"))
+    parent, create_table = os.getpid(), uscics_csv.create_table
+
+    def parent_only(cursor, years=None):
+        assert os.getpid() == parent, "DDL in a worker"
+        create_table(cursor, years)
+
+    # workers are forked, so they inherit the check
+    monkeypatch.setattr(uscics_csv, "create_table", parent_only)
+    assert uscics_csv.main(workers=2, dbname=dbname) == 2
+    cur = conn.cursor()
+    cur.execute("SELECT tableoid::regclass::text FROM h1b_visa_data ORDER BY fiscal_year")
+    assert [r[0] for r in cur.fetchall()] == ["h1b_visa_data_fy2031", "h1b_visa_data_fy2032"]
+    cur.execute("DROP TABLE h1b_ingest_manifest")
+
+def test_uscis_header_variants(tmp_path):
+    old = tmp_path / "h1b_datahubexport-2015.csv"
+    pd.DataFrame({"Fiscal Year  ": ["2015", "2015"], "Employer": ["Acme", "Globex"], "State": ["NY", "TX"],
+                  "City": ["NYC", "Austin"], "ZIP": ["1", "2"], "NAICS": ["54", "54"],
+                  "Initial  Approvals": ["1,200", ""], "Initial Denials": ["3", "2"],
+                  "Continuing Approvals": ["40", "1"], "Continuing Denials": ["0", "0"]}).to_csv(old, index=False)
+    out = uscics_csv.process_uscis_data(str(old))
+    assert out.columns.tolist() == uscics_csv.OUTPUT_COLUMNS
+    assert out["initial_approvals"].tolist() == [1200, 0]
+    assert out["approval_status"].tolist() == ["Approved", "Denied"]
+
+    new = tmp_path / "h1b_datahubexport-2024.csv"
+    pd.DataFrame({"Fiscal Year": ["2024"], "Employer (Petitioner) Name": ["Acme"], "Petitioner State": ["NY"],
+                  "Petitioner City": ["NYC"], "Petitioner Zip Code": ["1"],
+                  "New Employment Approval": ["5"], "New Employment Denial": ["1"],
+                  "Continuation Approval": ["7"], "Change of Employer Approval": ["3"],
+                  "Continuation Denial": ["1"], "Amended Denial": ["2"]}).to_csv(new, index=False)
+    row = uscics_csv.process_uscis_data(str(new)).iloc[0]
+    assert (row["employer_name"], row["initial_approvals"], row["continuing_approvals"], row["continuing_denials"]) == ("Acme", 5, 10, 3)
+
+    bare = tmp_path / "h1b_datahubexport-2009.csv"
+    pd.DataFrame({"Fiscal Year": ["2009"], "Employer": ["Acme"]}).to_csv(bare, index=False)
+    row = uscics_csv.process_uscis_data(str(bare)).iloc[0]
+    assert row["approval_status"] == "Unknown" and pd.isna(row["initial_approvals"])
+
+def test_partitioned_by_fiscal_year(conn, dbname):
+    cur = conn.cursor()
+    cur.execute("DROP TABLE IF EXISTS h1b_ingest_manifest")
+    # a plain table from an older version is converted in place
+    cur.execute("CREATE TABLE h1b_visa_data (id SERIAL PRIMARY KEY, fiscal_year INT, employer_name TEXT, state TEXT,"
+                " city TEXT, zip_code TEXT, approval_status TEXT)")
+    cur.execute("INSERT INTO h1b_visa_data (fiscal_year, employer_name) VALUES (2015, 'Acme'), (1999, 'Old'), (NULL, 'Nul')")
+    df = pd.DataFrame({"fiscal_year": ["2015", "2031", None], "employer_name": ["Globex", "Future", "Blank"],
+                       "approval_status": ["Approved", "Denied", "Unknown"]})
+    assert uscics_csv.save_to_postgres(df, dbname=dbname) == 3
+
+    cur.execute("SELECT relkind FROM pg_class WHERE relname = 'h1b_visa_data'")
+    assert cur.fetchone()[0] == "p"
+    cur.execute("SELECT tableoid::regclass::text, employer_name FROM h1b_visa_data ORDER BY id")
+    assert cur.fetchall() == [("h1b_visa_data_fy2015", "Acme"), ("h1b_visa_data_fy1999", "Old"),
+                              ("h1b_visa_data_default", "Nul"), ("h1b_visa_data_fy2015", "Globex"),
+                              ("h1b_visa_data_fy2031", "Future"), ("h1b_visa_data_default", "Blank")]
+
+    with db.connection(dbname=dbname) as c, c.cursor() as cursor:
+        uscics_csv.create_indexes(cursor)
+    cur.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'h1b_visa_data' ORDER BY 1")
+    assert [r[0] for r in cur.fetchall()] == sorted([f"h1b_visa_data_{c}_idx" for c in uscics_csv.INDEXED_COLUMNS]
+                                                    + ["h1b_visa_data_untagged_idx"])
+    cur.execute("DROP TABLE h1b_ingest_manifest")
+
+def test_legacy_rows_replaced_once_every_source_is_tracked(conn, tmp_path, monkeypatch, dbname):
+    cur = conn.cursor()
+    cur.execute("DROP TABLE IF EXISTS h1b_ingest_manifest")
+    # rows loaded by a version without source_file or the manifest
+    cur.execute("CREATE TABLE h1b_visa_data (id SERIAL PRIMARY KEY, fiscal_year INT, employer_name TEXT, state TEXT,"
+                " city TEXT, zip_code TEXT, approval_status TEXT)")
+    cur.execute("INSERT INTO h1b_visa_data (fiscal_year, employer_name) VALUES"
+                " (2022, 'Acme'), (2022, 'Globex'), (2024, 'Acme'), (2019, 'Kept')")
+    path = tmp_path / "h1b_datahubexport-2022.csv"
+    pd.DataFrame({"Fiscal Year": [2022] * 2, "Employer": ["Acme", "Globex"], "State": ["NY", "TX"],
+                  "City": ["NYC", "Austin"], "ZIP": ["1", "2"],
+                  "Initial Approval": ["1", "0"], "Initial Denial": ["0", "1"]}).to_csv(path, index=False)
+    bloomberg = tmp_path / "TRK_13139_FY2024_single_reg.csv"
+    monkeypatch.setattr(uscics_csv, "uscis_files", [str(path)])
+    monkeypatch.setattr(uscics_csv, "bloomberg_file", str(bloomberg))
+
+    # the Bloomberg file is missing, so untagged rows cannot be attributed and stay
+    assert uscics_csv.main(workers=1, dbname=dbname) == 2
+    cur.execute("SELECT count(*) FROM h1b_visa_data WHERE source_file IS NULL")
+    assert cur.fetchone()[0] == 4
+
+    pd.DataFrame({"lottery_year": ["2024"], "status_type": ["SELECTED"], "employer_name": ["Acme"],
+                  "state": ["NY"], "city": ["New York"], "zip": ["10001"]}).to_csv(bloomberg, index=False)
+    assert uscics_csv.main(workers=1, dbname=dbname) == 1
+    cur.execute("SELECT fiscal_year, employer_name, source_file FROM h1b_visa_data ORDER BY 1, 2")
+    assert cur.fetchall() == [(2019, "Kept", None), (2022, "Acme", path.name), (2022, "Globex", path.name),
+                              (2024, "Acme", bloomberg.name)]
+    cur.execute("DROP TABLE h1b_ingest_manifest")
+
+def test_failed_load_exits_non_zero(conn, tmp_path, monkeypatch, capsys, dbname):
+    conn.cursor().execute("DROP TABLE IF EXISTS h1b_ingest_manifest")
+    files = []
+    for year in (2022, 2023):
+        path = tmp_path / f"h1b_datahubexport-{year}.csv"
+        pd.DataFrame({"Fiscal Year": [year], "Employer": ["Acme"], "State": ["NY"],
+                      "City": ["NYC"], "ZIP": ["1"], "Initial Approval": ["1"]}).to_csv(path, index=False)
+        files.append(str(path))
+    monkeypatch.setattr(uscics_csv, "uscis_files", files)
+    monkeypatch.setattr(uscics_csv, "bloomberg_file", str(tmp_path / "missing.csv"))
+    real_save = uscics_csv.save_to_postgres
+    # workers are forked, so they inherit the patched save; 2023 fails like a database error would
+    monkeypatch.setattr(uscics_csv, "save_to_postgres",
+                        lambda df, manifest=None, **kw: None if "2023" in manifest["source_file"] else real_save(df, manifest, **kw))
+
+    with pytest.raises(SystemExit, match="1 of 2 file.*h1b_datahubexport-2023.csv"):
+        uscics_csv.main(workers=1, dbname=dbname)
+    assert "✅ Loaded h1b_datahubexport-2023.csv" not in capsys.readouterr().out
+    cur = conn.cursor()
+    cur.execute("SELECT source_file FROM h1b_ingest_manifest")
+    assert cur.fetchall() == [("h1b_datahubexport-2022.csv",)]
+    cur.execute("DROP TABLE h1b_ingest_manifest")
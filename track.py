@@ -1,16 +1,9 @@
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import psycopg2
-
-# PostgreSQL Connection Parameters
-DB_PARAMS = {
-    "dbname": "visa_tracker2",
-    "user": "postgres",
-    "password": "postgres",
-    "host": "localhost",
-    "port": "5432",
-}
+import tables
+import db
+import fetcher
+import http_cache
+import http_client
 
 # Define URLs for each section
 H1B_URLS = {
@@ -27,37 +20,39 @@ HEADERS = {"User-Agent": "Mozilla/5.0"}
 
 def clean_salary_column(salary_series):
     """Cleans salary values by removing '$' and ',' and converting to float."""
-    return salary_series.str.replace(r"[,$]", "", regex=True).astype(float)
+    return tables.to_number(salary_series)
 
-def fetch_h1b_data(section, url):
+def fetch_h1b_data(section, url, cache=None):
     """Scrapes data from H1BData.info for a specific section."""
     print(f"🔄 Fetching {section} data...")
 
-    response = requests.get(url, headers=HEADERS)
+    try:
+        response = http_client.get(url, headers=HEADERS) if cache is None else cache.get(url, headers=HEADERS)
+    except requests.RequestException as e:
+        print(f"❌ Failed to fetch {section}! {type(e).__name__}: {e}")
+        return None
+    if cache is not None and not response.changed:
+        print(f"⏭️ {section} unchanged since the last run")
+        return None
+    return parse_h1b_page(section, response)
+
+def parse_h1b_page(section, response):
+    """Turns a fetched section page (requests or httpx response) into a DataFrame, or None."""
     if response.status_code != 200:
         print(f"❌ Failed to fetch {section}! Status Code: {response.status_code}")
         return None
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    table = soup.find("table")
+    # Parse only the first table, straight into columns (no full-page soup)
+    df = tables.table_frame(response.text)
 
-    if not table:
+    if df is None:
         print(f"❌ No table found for {section}! The website layout might have changed.")
         return None
 
     print(f"✅ Table Found for {section}! Extracting data...")
 
-    # Extract table headers
-    headers = [th.text.strip().lower().replace(" ", "_") for th in table.find_all("th")]
-
-    # Extract rows
-    data = []
-    for row in table.find_all("tr")[1:]:  # Skip the header row
-        cols = row.find_all("td")
-        data.append([col.text.strip() for col in cols])
-
-    # Convert to DataFrame
-    df = pd.DataFrame(data, columns=headers)
+    # Header names as stored in the database schema
+    df = tables.snake_headers(df)
 
     # Rename columns based on database schema
     rename_map = {
@@ -73,7 +68,7 @@ def fetch_h1b_data(section, url):
 
     # Convert numeric columns
     if "filings" in df.columns:
-        df["filings"] = df["filings"].str.replace(",", "").fillna("0").astype(int)
+        df["filings"] = tables.to_number(df["filings"], int).fillna(0).astype(int)
 
     if "avg_salary" in df.columns:
         df["avg_salary"] = clean_salary_column(df["avg_salary"])
@@ -90,9 +85,6 @@ def save_to_postgres(df, table_name):
         return
 
     try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        cursor = conn.cursor()
-
         # Define unique column based on table name
         unique_column_mapping = {
             "h1b_top_companies": "company_name",
@@ -118,32 +110,23 @@ def save_to_postgres(df, table_name):
         # Ensure DataFrame only has the necessary columns
         df = df[expected_columns]
 
-        # SQL Query for Insertion with ON CONFLICT update
-        placeholders = ", ".join(["%s"] * len(expected_columns))
-        columns_sql = ", ".join(expected_columns)
-
-        for row in df.itertuples(index=False, name=None):
-            cursor.execute(
-                f"""
-                INSERT INTO {table_name} ({columns_sql})
-                VALUES ({placeholders})
-                ON CONFLICT ({unique_column}) DO UPDATE
-                SET filings = EXCLUDED.filings,
-                    avg_salary = EXCLUDED.avg_salary;
-                """,
-                row,
+        # Batched upsert: a handful of multi-row statements per section
+        with db.connection() as conn, conn.cursor() as cursor:
+            inserted, updated = db.upsert_values(
+                cursor, table_name, expected_columns, unique_column, df.itertuples(index=False, name=None)
             )
 
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-        print(f"✅ Data successfully updated in PostgreSQL for {table_name}!")
+        print(f"✅ Data successfully updated in PostgreSQL for {table_name}! ({inserted} inserted, {updated} updated)")
+        return inserted, updated
 
     except Exception as e:
         print(f"❌ Database Error for {table_name}: {e}")
 if __name__ == "__main__":
-    for section, url in H1B_URLS.items():
-        df = fetch_h1b_data(section, url)
-        if df is not None:
-            save_to_postgres(df, section)
+    cache = http_cache.HttpCache(consumer="track")
+
+    def save(section, df):
+        if save_to_postgres(df, section) is not None:
+            cache.commit(H1B_URLS[section])
+
+    # Fetch every section concurrently (conditionally) and save each changed one as it arrives
+    fetcher.run_all(H1B_URLS, parse_h1b_page, on_result=save, cache=cache)
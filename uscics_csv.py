@@ -1,17 +1,17 @@
+import argparse
+import io
 import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
-import psycopg2
+import bloomberg
+import db
+import rollups
+import source_cache
 from glob import glob
 
-# PostgreSQL Connection Parameters
-DB_PARAMS = {
-    "dbname": "visa_tracker2",
-    "user": "postgres",
-    "password": "postgres",
-    "host": "localhost",
-    "port": "5432",
-}
-
 # Directory where CSV files are stored
 CSV_DIRECTORY = r"C:\Users\Syed\Downloads\h1b_data"
 
@@ -19,126 +19,485 @@ CSV_DIRECTORY = r"C:\Users\Syed\Downloads\h1b_data"
 uscis_files = glob(os.path.join(CSV_DIRECTORY, "h1b_datahubexport-*.csv"))  # All USCIS CSVs
 bloomberg_file = os.path.join(CSV_DIRECTORY, "TRK_13139_FY2024_single_reg.csv")  # Bloomberg 2024
 
+# Lottery statuses that count as approvals (no 'Denied' cases in Bloomberg data)
+BLOOMBERG_STATUS = {"ELIGIBLE": "Approved", "SELECTED": "Approved"}
+
+# Columns produced by both processors (and stored in h1b_visa_data)
+COUNT_COLUMNS = ["initial_approvals", "initial_denials", "continuing_approvals", "continuing_denials"]
+OUTPUT_COLUMNS = ["fiscal_year", "employer_name", "state", "city", "zip_code", "approval_status"] + COUNT_COLUMNS
+
+# USCIS export headers drift between fiscal years; map every known spelling
+# (lower-cased, whitespace collapsed) to its canonical column. Count columns
+# listed more than once are summed, e.g. the FY2023+ continuing-type splits.
+USCIS_HEADERS = {
+    "fiscal year": "fiscal_year",
+    "employer": "employer_name",
+    "employer (petitioner) name": "employer_name",
+    "petitioner name": "employer_name",
+    "state": "state",
+    "petitioner state": "state",
+    "city": "city",
+    "petitioner city": "city",
+    "zip": "zip_code",
+    "zip code": "zip_code",
+    "petitioner zip code": "zip_code",
+    "initial approval": "initial_approvals",
+    "initial approvals": "initial_approvals",
+    "new employment approval": "initial_approvals",
+    "initial denial": "initial_denials",
+    "initial denials": "initial_denials",
+    "new employment denial": "initial_denials",
+    "continuing approval": "continuing_approvals",
+    "continuing approvals": "continuing_approvals",
+    "continuation approval": "continuing_approvals",
+    "change with same employer approval": "continuing_approvals",
+    "new concurrent approval": "continuing_approvals",
+    "change of employer approval": "continuing_approvals",
+    "amended approval": "continuing_approvals",
+    "continuing denial": "continuing_denials",
+    "continuing denials": "continuing_denials",
+    "continuation denial": "continuing_denials",
+    "change with same employer denial": "continuing_denials",
+    "new concurrent denial": "continuing_denials",
+    "change of employer denial": "continuing_denials",
+    "amended denial": "continuing_denials",
+}
 
-def process_uscis_data(file_path):
-    """Reads and processes USCIS H1B data (2009-2023) with flexible column handling."""
-    df = pd.read_csv(file_path, dtype=str)  # Read as string to handle missing values
-    df = df.rename(columns={
-        "Fiscal Year": "fiscal_year",
-        "Employer": "employer_name",
-        "State": "state",
-        "City": "city",
-        "ZIP": "zip_code",
-    })
-
-    # Identify correct column names for approvals
-    approval_cols = [col for col in df.columns if "Initial Approval" in col]
-    denial_cols = [col for col in df.columns if "Initial Denial" in col]
-
-    initial_approval_col = approval_cols[0] if approval_cols else None
-    initial_denial_col = denial_cols[0] if denial_cols else None
-
-    if initial_approval_col and initial_denial_col:
-        df[initial_approval_col] = df[initial_approval_col].str.replace(",", "").astype(float).fillna(0).astype(int)
-        df[initial_denial_col] = df[initial_denial_col].str.replace(",", "").astype(float).fillna(0).astype(int)
-
-        df["approval_status"] = df.apply(
-            lambda row: "Approved" if row[initial_approval_col] > 0 else "Denied", axis=1
-        )
-    else:
-        print(f"⚠️ Missing approval/denial columns in {file_path}, setting status as 'Unknown'.")
-        df["approval_status"] = "Unknown"  # Fallback if missing
 
-    return df[["fiscal_year", "employer_name", "state", "city", "zip_code", "approval_status"]]
+def null_counts(n):
+    """An all-NULL Int64 column of length n, built without a Python list."""
+    return pd.arrays.IntegerArray(np.zeros(n, dtype="int64"), np.ones(n, dtype=bool))
 
 
-def process_bloomberg_data(file_path):
-    """Reads and processes Bloomberg H1B data (2024)."""
-    df = pd.read_csv(file_path, dtype=str)  # Read as string
+def header_key(column):
+    return " ".join(str(column).lower().split())
 
-    # Ensure columns exist
-    if "lottery_year" not in df.columns or "status_type" not in df.columns:
-        print(f"⚠️ Missing required columns in {file_path}. Skipping processing.")
-        return pd.DataFrame()
 
-    df = df.rename(columns={
-        "employer_name": "employer_name",
-        "state": "state",
-        "city": "city",
-        "zip": "zip_code",
-        "status_type": "approval_status",
-    })
+def process_uscis_data(file_path):
+    """Reads and processes USCIS H1B data (2009-2024), keeping approval/denial counts.
+
+    Header variants are resolved once from the header row, only recognised
+    columns are read, counts are parsed by the CSV reader and every
+    transform is a column-wide array operation.
+    """
+    header = pd.read_csv(file_path, nrows=0).columns
+    sources = {}
+    for col in header:
+        if header_key(col) in USCIS_HEADERS:
+            sources.setdefault(USCIS_HEADERS[header_key(col)], []).append(col)
+    count_cols = [c for name in COUNT_COLUMNS for c in sources.get(name, [])]
+    usecols = [c for cols in sources.values() for c in cols]
+
+    # Counts are parsed by the C reader ("1,200" via thousands=","); text stays str
+    dtypes = {c: (float if c in count_cols else str) for c in usecols}
+    try:
+        df = pd.read_csv(file_path, usecols=usecols, dtype=dtypes, thousands=",")
+    except ValueError:
+        # stray non-numeric counts: read as text and coerce them to NaN
+        df = pd.read_csv(file_path, usecols=usecols, dtype=str)
+        for c in count_cols:
+            df[c] = pd.to_numeric(df[c].str.replace(",", "", regex=False), errors="coerce")
+
+    out = pd.DataFrame(index=df.index)
+    for col in ["fiscal_year", "employer_name", "state", "city", "zip_code"]:
+        out[col] = df[sources[col][0]] if col in sources else None
+
+    for col in COUNT_COLUMNS:
+        if col in sources:
+            out[col] = df[sources[col]].fillna(0).sum(axis=1).astype("int64").astype("Int64")
+        else:
+            out[col] = null_counts(len(df))
+
+    if "initial_approvals" in sources and "initial_denials" in sources:
+        out["approval_status"] = np.where(out["initial_approvals"].to_numpy(dtype="int64") > 0, "Approved", "Denied")
+    else:
+        print(f"⚠️ Missing approval/denial columns in {file_path}, setting status as 'Unknown'.")
+        out["approval_status"] = "Unknown"  # Fallback if missing
 
-    # Convert lottery status to match USCIS dataset (No 'Denied' cases in Bloomberg data)
-    df["approval_status"] = df["approval_status"].map({
-        "ELIGIBLE": "Approved",
-        "SELECTED": "Approved"
-    }).fillna("Unknown")
+    return out[OUTPUT_COLUMNS]
 
-    df["fiscal_year"] = "2024"  # Set fixed year for Bloomberg data
 
-    return df[["fiscal_year", "employer_name", "state", "city", "zip_code", "approval_status"]]
+def process_bloomberg_data(file_path):
+    """Reads and processes Bloomberg H1B data (2024) through the projected categorical reader."""
+    # Ensure columns exist (answered from the cached schema on reruns)
+    if not set(bloomberg.REQUIRED_COLUMNS) <= set(bloomberg.bloomberg_schema(file_path)):
+        print(f"⚠️ Missing required columns in {file_path}. Skipping processing.")
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+
+    df = bloomberg.load_bloomberg(file_path).rename(columns={"zip": "zip_code", "status_type": "approval_status"})
+    for col in ["employer_name", "state", "city", "zip_code"]:
+        if col not in df.columns:
+            df[col] = None
+
+    # Convert lottery status to match USCIS dataset; remapping the category codes keeps the column categorical
+    status = df["approval_status"].cat
+    labels = ["Approved", "Unknown"]
+    code_map = np.array([labels.index(BLOOMBERG_STATUS.get(c, "Unknown")) for c in status.categories] + [1], dtype="int8")
+    df["approval_status"] = pd.Categorical.from_codes(code_map[status.codes.to_numpy()], labels)
+
+    df["fiscal_year"] = pd.Categorical.from_codes(np.zeros(len(df), dtype="int8"), ["2024"])  # Fixed year for Bloomberg data
+
+    # Registrations carry no petition counts
+    for col in COUNT_COLUMNS:
+        df[col] = null_counts(len(df))
+
+    return df[OUTPUT_COLUMNS]
+
+
+COPY_CHUNK_ROWS = 200_000  # rows serialized per COPY buffer
+H1B_COLUMNS = OUTPUT_COLUMNS + ["source_file"]
+FISCAL_YEARS = range(2009, 2027)  # partitions created up front; later years are added on load
+INDEXED_COLUMNS = ["employer_name", "state", "approval_status"]
+
+
+def copy_frame(cursor, df, table, columns=H1B_COLUMNS, chunk_rows=COPY_CHUNK_ROWS):
+    """Streams df into `table` with COPY FROM STDIN, one in-memory CSV buffer per chunk.
+
+    Missing values are written as \\N, so empty strings stay empty strings.
+    """
+    total = len(df)
+    copy_sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    start = time.perf_counter()
+    for lo in range(0, total, chunk_rows):
+        buf = io.StringIO()
+        df.iloc[lo:lo + chunk_rows][columns].to_csv(buf, index=False, header=False, na_rep="\\N")
+        buf.seek(0)
+        cursor.copy_expert(copy_sql, buf)
+        done = min(lo + chunk_rows, total)
+        rate = done / max(time.perf_counter() - start, 1e-9)
+        print(f"📦 Copied {done:,}/{total:,} rows ({rate:,.0f} rows/s)")
+    return total / max(time.perf_counter() - start, 1e-9)
+
+
+def create_table(cursor, years=None):
+    """Creates h1b_visa_data (partitioned by fiscal_year) and the ingestion manifest if needed.
+
+    One LIST partition per fiscal year plus a default partition for rows
+    without a recognised year; `years` defaults to every USCIS/Bloomberg
+    year so loads never need DDL. A plain table left by an older version
+    is converted in place.
+    """
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('h1b_visa_data')")
+    row = cursor.fetchone()
+    legacy = row is not None and row[0] != "p"
+    if legacy:
+        cursor.execute("ALTER TABLE h1b_visa_data RENAME TO h1b_visa_data_legacy")
+        cursor.execute("ALTER SEQUENCE IF EXISTS h1b_visa_data_id_seq RENAME TO h1b_visa_data_legacy_id_seq")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS h1b_visa_data (
+        id BIGSERIAL,
+        fiscal_year INT,
+        employer_name TEXT,
+        state TEXT,
+        city TEXT,
+        zip_code TEXT,
+        approval_status TEXT,
+        initial_approvals INT,
+        initial_denials INT,
+        continuing_approvals INT,
+        continuing_denials INT,
+        source_file TEXT
+    ) PARTITION BY LIST (fiscal_year)
+    """)
+    cursor.execute("CREATE TABLE IF NOT EXISTS h1b_visa_data_default PARTITION OF h1b_visa_data DEFAULT")
+    # Rows loaded before the manifest existed carry no source_file; keeps sweep_legacy_rows cheap
+    cursor.execute("CREATE INDEX IF NOT EXISTS h1b_visa_data_untagged_idx ON h1b_visa_data (fiscal_year) WHERE source_file IS NULL")
+    ensure_partitions(cursor, FISCAL_YEARS if years is None else years)
+
+    if legacy:
+        cursor.execute("ALTER TABLE h1b_visa_data_legacy ADD COLUMN IF NOT EXISTS source_file TEXT")
+        for col in COUNT_COLUMNS:
+            cursor.execute(f"ALTER TABLE h1b_visa_data_legacy ADD COLUMN IF NOT EXISTS {col} INT")
+        cursor.execute("SELECT DISTINCT fiscal_year FROM h1b_visa_data_legacy WHERE fiscal_year IS NOT NULL")
+        ensure_partitions(cursor, [r[0] for r in cursor.fetchall()])
+        cols = ", ".join(["id"] + H1B_COLUMNS)
+        cursor.execute(f"INSERT INTO h1b_visa_data ({cols}) SELECT {cols} FROM h1b_visa_data_legacy")
+        print(f"🧱 Moved {cursor.rowcount:,} rows into the partitioned h1b_visa_data")
+        cursor.execute("SELECT setval('h1b_visa_data_id_seq', GREATEST((SELECT max(id) FROM h1b_visa_data), 1))")
+        cursor.execute("DROP TABLE h1b_visa_data_legacy")
+
+    # One row per loaded source file
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS h1b_ingest_manifest (
+        source_file TEXT PRIMARY KEY,
+        sha256 TEXT,
+        size BIGINT,
+        mtime_ns BIGINT,
+        fiscal_years INT[],
+        row_count BIGINT,
+        loaded_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def ensure_partitions(cursor, years):
+    """Adds a partition for each fiscal year that lacks one.
+
+    Rows already parked in the default partition for that year are moved
+    into the new table before it is attached.
+    """
+    cursor.execute("""
+    SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'h1b_visa_data'::regclass
+    """)
+    existing = {r[0] for r in cursor.fetchall()}
+    for year in sorted({int(y) for y in years}):
+        name = f"h1b_visa_data_fy{year}"
+        if name in existing:
+            continue
+        cursor.execute(f"CREATE TABLE {name} (LIKE h1b_visa_data INCLUDING DEFAULTS)")
+        cursor.execute(f"""
+        WITH moved AS (DELETE FROM h1b_visa_data_default WHERE fiscal_year = %s RETURNING *)
+        INSERT INTO {name} SELECT * FROM moved
+        """, (year,))
+        cursor.execute(f"ALTER TABLE h1b_visa_data ATTACH PARTITION {name} FOR VALUES IN ({year})")
+
+
+def create_indexes(cursor, years=None):
+    """Builds the lookup indexes (once, after the bulk load) and refreshes planner statistics.
+
+    With `years`, only those fiscal-year partitions (plus the default one)
+    are analyzed instead of every partition.
+    """
+    for col in INDEXED_COLUMNS:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS h1b_visa_data_{col}_idx ON h1b_visa_data ({col})")
+    if years is None:
+        cursor.execute("ANALYZE h1b_visa_data")
+        return
+    for name in [f"h1b_visa_data_fy{int(y)}" for y in sorted(set(years))] + ["h1b_visa_data_default"]:
+        cursor.execute("SELECT to_regclass(%s)", (name,))
+        if cursor.fetchone()[0] is not None:
+            cursor.execute(f"ANALYZE {name}")
+
+
+def file_fiscal_years(path):
+    """Fiscal years named in a source file's name (h1b_datahubexport-2022.csv, ..._FY2024_...)."""
+    return [int(y) for y in re.findall(r"(?:FY|-)(\d{4})(?!\d)", os.path.basename(path))]
+
+
+def save_to_postgres(df, manifest=None, create=True, **db_params):
+    """Bulk-loads H1B Visa data into PostgreSQL via a COPY-filled staging table.
+
+    With a `manifest` entry (source_file, sha256, size, mtime_ns) the rows
+    previously loaded from that file are replaced and the manifest updated,
+    all in one transaction. Rows an older version loaded without a
+    source_file are left to sweep_legacy_rows. With create=False the caller
+    has already created the table and partitions (main does, once, before
+    starting its workers); rows for a year without a partition land in the
+    default partition.
+    """
+    source = manifest["source_file"] if manifest else None
+    df = df.reindex(columns=OUTPUT_COLUMNS).assign(source_file=source)  # absent count columns load as NULL
+    try:
+        # New fiscal years get their partition in a short transaction of their own
+        if create:
+            years = pd.to_numeric(pd.Series(df["fiscal_year"].unique(), dtype=object), errors="coerce").dropna()
+            with db.connection(**db_params) as conn, conn.cursor() as cursor:
+                create_table(cursor, years=years)
 
+        with db.connection(**db_params) as conn, conn.cursor() as cursor:
 
-def save_to_postgres(df):
-    """Stores the merged H1B Visa data into PostgreSQL."""
-    try:
-        conn = psycopg2.connect(**DB_PARAMS)
-        cursor = conn.cursor()
-
-        # Create table if not exists
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS h1b_visa_data (
-            id SERIAL PRIMARY KEY,
-            fiscal_year INT,
-            employer_name TEXT,
-            state TEXT,
-            city TEXT,
-            zip_code TEXT,
-            approval_status TEXT
-        )
-        """)
-
-        # Insert data
-        for _, row in df.iterrows():
+            # Staging table lives only for this transaction
             cursor.execute("""
-            INSERT INTO h1b_visa_data (fiscal_year, employer_name, state, city, zip_code, approval_status)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """, tuple(row))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+            CREATE TEMP TABLE h1b_visa_data_stage (
+                fiscal_year INT,
+                employer_name TEXT,
+                state TEXT,
+                city TEXT,
+                zip_code TEXT,
+                approval_status TEXT,
+                initial_approvals INT,
+                initial_denials INT,
+                continuing_approvals INT,
+                continuing_denials INT,
+                source_file TEXT
+            ) ON COMMIT DROP
+            """)
+            rate = copy_frame(cursor, df, "h1b_visa_data_stage")
 
-        print("✅ Data successfully saved to PostgreSQL!")
+            cursor.execute("""
+            SELECT array_agg(DISTINCT fiscal_year) FILTER (WHERE fiscal_year IS NOT NULL) FROM h1b_visa_data_stage
+            """)
+            years = cursor.fetchone()[0] or []
+
+            # Replace whatever this source loaded last time, touching only the partitions it filled
+            if source:
+                cursor.execute("SELECT fiscal_years FROM h1b_ingest_manifest WHERE source_file = %s", (source,))
+                previous = cursor.fetchone()
+                if previous is None or previous[0] is None:
+                    cursor.execute("DELETE FROM h1b_visa_data WHERE source_file = %s", (source,))
+                else:
+                    cursor.execute("""
+                    DELETE FROM h1b_visa_data
+                    WHERE (fiscal_year = ANY(%s) OR fiscal_year IS NULL) AND source_file = %s
+                    """, (previous[0], source))
+                replaced = cursor.rowcount
+                if replaced:
+                    print(f"♻️ Replaced {replaced:,} rows previously loaded from {source}")
+
+            # Merge staged rows into the main table
+            cols = ", ".join(H1B_COLUMNS)
+            cursor.execute(f"INSERT INTO h1b_visa_data ({cols}) SELECT {cols} FROM h1b_visa_data_stage")
+            merged = cursor.rowcount
+
+            if manifest:
+                cursor.execute("""
+                INSERT INTO h1b_ingest_manifest (source_file, sha256, size, mtime_ns, fiscal_years, row_count, loaded_at)
+                VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (source_file) DO UPDATE
+                SET sha256 = EXCLUDED.sha256,
+                    size = EXCLUDED.size,
+                    mtime_ns = EXCLUDED.mtime_ns,
+                    fiscal_years = EXCLUDED.fiscal_years,
+                    row_count = EXCLUDED.row_count,
+                    loaded_at = CURRENT_TIMESTAMP;
+                """, (source, manifest["sha256"], manifest["size"], manifest["mtime_ns"], years, merged))
+
+        print(f"✅ Data successfully saved to PostgreSQL! {merged:,} rows ({rate:,.0f} rows/s)")
+        return merged
 
     except Exception as e:
         print(f"❌ Database Error: {e}")
 
 
-def main():
-    """Main function to process and save H1B data."""
-    all_data = []
-
-    # Process USCIS historical data
-    for file in uscis_files:
-        print(f"📂 Processing: {file}")
-        df = process_uscis_data(file)
-        all_data.append(df)
-
-    # Process Bloomberg 2024 data
-    print(f"📂 Processing: {bloomberg_file}")
-    df_bloomberg = process_bloomberg_data(bloomberg_file)
-    all_data.append(df_bloomberg)
-
-    # Merge all data
-    final_df = pd.concat(all_data, ignore_index=True)
-
-    # Save to PostgreSQL
-    save_to_postgres(final_df)
-
-    print("✅ H1B Visa data processing complete!")
+def sweep_legacy_rows(cursor, sources):
+    """Deletes rows an older version loaded without a source_file; returns the number deleted.
+
+    Call only once every one of `sources` (source_file names) is in the
+    manifest: untagged rows cannot be traced to the file that produced
+    them, so they are replaced only for the fiscal years the manifest
+    covers (and NULL years when a tracked file loaded some).
+    """
+    cursor.execute("""
+    DELETE FROM h1b_visa_data
+    WHERE source_file IS NULL
+      AND (fiscal_year IN (SELECT unnest(fiscal_years) FROM h1b_ingest_manifest WHERE source_file = ANY(%s))
+           OR (fiscal_year IS NULL AND EXISTS (
+               SELECT 1 FROM h1b_visa_data WHERE fiscal_year IS NULL AND source_file = ANY(%s))))
+    """, (sources, sources))
+    return cursor.rowcount
+
+
+def plan_load(file_path, loaded, cursor):
+    """Manifest entry for a file that needs (re)loading, or None when it is unchanged.
+
+    Size + mtime matching the manifest skips the file without reading it;
+    otherwise the checksum decides, and a touched-but-identical file only
+    gets its recorded mtime refreshed.
+    """
+    st = os.stat(file_path)
+    source = os.path.basename(file_path)
+    previous = loaded.get(source)
+    if previous and (previous["size"], previous["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+        return None
+    sha = source_cache.file_sha256(file_path)
+    if previous and previous["sha256"] == sha:
+        cursor.execute("UPDATE h1b_ingest_manifest SET mtime_ns = %s WHERE source_file = %s", (st.st_mtime_ns, source))
+        return None
+    return {"source_file": source, "sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def ingest_file(file_path, processor, staging_dir=None, manifest=None, **db_params):
+    """Processes one source file and ships it straight to PostgreSQL (or a Parquet file in staging_dir).
+
+    Returns the rows loaded; raises RuntimeError when the database load failed.
+    """
+    print(f"📂 Processing: {file_path}")
+    df = processor(file_path)
+    if staging_dir:
+        out = os.path.join(staging_dir, os.path.splitext(os.path.basename(file_path))[0] + ".parquet")
+        df.to_parquet(out, index=False)
+        return len(df)
+    rows = save_to_postgres(df, manifest, create=False, **db_params)
+    if rows is None:
+        raise RuntimeError(f"loading {os.path.basename(file_path)} into PostgreSQL failed")
+    return rows
+
+
+def main(workers=None, staging_dir=None, **db_params):
+    """Processes every new or changed USCIS export plus the Bloomberg file in a process pool.
+
+    Each worker loads its own file, so no frame is ever concatenated and
+    memory per worker is bounded by the file it is handling. Files whose
+    checksum matches the ingestion manifest are skipped. Returns the rows
+    loaded; if any file failed, the failures are listed and SystemExit is
+    raised after the other files finish.
+    """
+    jobs = [(file, process_uscis_data) for file in uscis_files]
+    jobs.append((bloomberg_file, process_bloomberg_data))
+    missing = [file for file, _ in jobs if not os.path.exists(file)]
+    for file in missing:
+        print(f"⚠️ Source file not found, skipping: {file}")
+    jobs = [(file, fn) for file, fn in jobs if file not in missing]
+    sources = [os.path.basename(file) for file, _ in jobs]
+
+    manifests = {}
+    if staging_dir:
+        os.makedirs(staging_dir, exist_ok=True)
+    else:
+        # Create the tables and the planned files' partitions up front so workers never race on DDL
+        with db.connection(**db_params) as conn, conn.cursor() as cursor:
+            create_table(cursor)
+            cursor.execute("SELECT source_file, sha256, size, mtime_ns FROM h1b_ingest_manifest")
+            loaded = {r[0]: {"sha256": r[1], "size": r[2], "mtime_ns": r[3]} for r in cursor.fetchall()}
+            for file, _ in jobs:
+                manifests[file] = plan_load(file, loaded, cursor)
+            ensure_partitions(cursor, [y for file, _ in jobs if manifests[file] for y in file_fiscal_years(file)])
+        skipped = [file for file, _ in jobs if manifests[file] is None]
+        if skipped:
+            print(f"⏭️ {len(skipped)} unchanged file(s) skipped")
+        jobs = [(file, fn) for file, fn in jobs if manifests[file] is not None]
+
+    total = 0
+    failed, loaded = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(ingest_file, file, fn, staging_dir, manifests.get(file), **db_params): file
+            for file, fn in jobs
+        }
+        for future in as_completed(futures):
+            name = os.path.basename(futures[future])
+            try:
+                rows = future.result()
+            except Exception as e:
+                failed.append(name)
+                print(f"❌ Failed to load {name}: {e}")
+                continue
+            total += rows
+            loaded.append(name)
+            print(f"✅ Loaded {name}: {rows:,} rows")
+
+    if not staging_dir and loaded:
+        # Index once the bulk rows are in rather than maintaining indexes row by row during COPY,
+        # and analyze only the partitions this run wrote to
+        start = time.perf_counter()
+        with db.connection(**db_params) as conn, conn.cursor() as cursor:
+            if not missing and not failed:
+                # Every source is now tracked by the manifest, so untagged rows from older versions are duplicates
+                swept = sweep_legacy_rows(cursor, sources)
+                if swept:
+                    print(f"♻️ Replaced {swept:,} rows loaded before the ingestion manifest")
+            cursor.execute("SELECT DISTINCT unnest(fiscal_years) FROM h1b_ingest_manifest WHERE source_file = ANY(%s)", (loaded,))
+            years = [r[0] for r in cursor.fetchall()]
+            create_indexes(cursor, years=years)
+        print(f"🗂️ Indexes ready in {time.perf_counter() - start:.1f}s")
+
+        # Keep the local h1b_top_* / h1b_highest_paid_* rankings current with this ingest
+        with db.connection(**db_params) as conn, conn.cursor() as cursor:
+            changed = rollups.refresh_for_years(cursor, years)
+        if changed:
+            print(f"🏆 Rankings refreshed: {sum(changed.values())} rows inserted or changed")
+
+    if failed:
+        raise SystemExit(f"❌ {len(failed)} of {len(jobs)} file(s) failed to load: {', '.join(sorted(failed))}")
+    print(f"✅ H1B Visa data processing complete! {total:,} rows from {len(jobs)} files")
+    return total
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Load USCIS and Bloomberg H-1B files into PostgreSQL")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--staging-dir", help="write one Parquet file per source instead of loading the database")
+    args = parser.parse_args()
+    main(workers=args.workers, staging_dir=args.staging_dir)